@@ -0,0 +1,146 @@
+import time
+import warnings
+
+import numpy as np
+
+from attribution import ensemble_attribution
+from backends import predict_positive
+from thread_budget import budget
+
+# The model was fitted on a DataFrame; the encoded float32 matrices carry no
+# column names, which sklearn would otherwise warn about on every request.
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+
+class StageTimer:
+    """
+    Collects the wall time of each named stage of a request.
+    Usage:
+    timer = StageTimer()
+    with timer('encode'):
+        ...
+    timer.timings -> {'encode': seconds, ...}
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._stage = None
+        self._start = None
+
+    def __call__(self, stage):
+        self._stage = stage
+        return self
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timings[self._stage] = self.timings.get(self._stage, 0.0) + time.perf_counter() - self._start
+        return False
+
+
+class PredictionResult:
+    """
+    Everything computed for one assessment, produced exactly once per request and
+    handed to the display code.
+    Attributes:
+    answers (dict): The 22 answers, keyed by feature name.
+    encoded (np.ndarray): The (1, n_features) CatBoost-encoded row fed to the model.
+    risk (float): Predicted heart disease risk in percent.
+    contributions (np.ndarray): Ensemble contributions of each feature (probability units).
+    importances (dict): feature -> share of the absolute contributions, in percent.
+    timings (dict): stage -> seconds ('encode', 'predict', 'explain', 'importances').
+    batch_size (int): Number of rows scored together with this one.
+    source (str): Where the result came from: 'model', or the cache tier that served it.
+    """
+
+    def __init__(self, answers, encoded, risk, contributions, importances, timings, batch_size=1, source='model'):
+        self.answers = answers
+        self.encoded = encoded
+        self.risk = risk
+        self.contributions = contributions
+        self.importances = importances
+        self.timings = timings
+        self.batch_size = batch_size
+        self.source = source
+
+    def to_dict(self):
+        """
+        Return a JSON-serializable copy of the result.
+        """
+        return {
+            'answers': dict(self.answers),
+            'encoded': np.asarray(self.encoded, dtype=float).ravel().tolist(),
+            'risk': self.risk,
+            'contributions': np.asarray(self.contributions, dtype=float).tolist(),
+            'importances': dict(self.importances),
+        }
+
+    @classmethod
+    def from_dict(cls, payload, source):
+        """
+        Rebuild a result saved with `to_dict`; no model work is involved.
+        """
+        return cls(
+            answers=payload['answers'],
+            encoded=np.asarray(payload['encoded'], dtype=np.float32)[None, :],
+            risk=payload['risk'],
+            contributions=np.asarray(payload['contributions']),
+            importances=payload['importances'],
+            timings={},
+            source=source,
+        )
+
+    def sorted_importances(self):
+        """
+        Return (feature, importance) pairs, most important first.
+        """
+        return sorted(self.importances.items(), key=lambda item: item[1], reverse=True)
+
+
+def assess_batch(answers_list, model, encoder, explainer_pool):
+    """
+    Run the assessment pipeline (encode -> predict_proba -> ensemble contributions ->
+    importance shares) once for a batch of answer dicts.
+    Parameters:
+    answers_list (list): Answer dicts keyed by feature name.
+    model: The scoring backend (see backends.py).
+    encoder (FrozenEncoder): The compiled CatBoost encoder (see fast_encoder.py).
+    explainer_pool (ExplainerPool): Prebuilt per-member explainers.
+    Returns:
+    list: One PredictionResult per answer dict, in input order.
+    """
+    timer = StageTimer()
+    with timer('encode'):
+        input_encoded = encoder.encode_records(answers_list)
+    with timer('predict'):
+        risks = predict_positive(model, input_encoded, answers_list) * 100
+    with timer('explain'), budget.limit(len(answers_list)):
+        attribution = ensemble_attribution(explainer_pool, input_encoded)
+    with timer('importances'):
+        shares = attribution.importance_percent()
+        columns = encoder.columns
+        importances = [dict(zip(columns, row.tolist())) for row in shares]
+
+    results = []
+    for i, answers in enumerate(answers_list):
+        results.append(PredictionResult(
+            answers=answers,
+            encoded=input_encoded[i:i + 1],
+            risk=float(risks[i]),
+            contributions=attribution.contributions[i],
+            importances=importances[i],
+            timings=timer.timings,
+            batch_size=len(answers_list),
+        ))
+    return results
+
+
+def assess(answers, model, encoder, explainer_pool):
+    """
+    Run the assessment pipeline for a single answer dict.
+    Returns:
+    PredictionResult: Risk, contributions, importance shares and stage timings.
+    """
+    return assess_batch([answers], model, encoder, explainer_pool)[0]
@@ -0,0 +1,184 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import metrics
+from assessment import PredictionResult, assess
+from schema import FEATURES
+
+
+def answers_key(answers):
+    """
+    Canonical, hashable form of an answer dict: the answers in model feature order.
+    """
+    return tuple(answers[feature] for feature in FEATURES)
+
+
+class AssessmentCache:
+    """
+    Memoizes assessments keyed on (model version, canonical answer tuple).
+    Every input of the app is a selectbox, so the answers fully determine the
+    risk, the contributions and the recommendations.
+    * Memory tier: bounded LRU (`max_entries`), shared by all sessions.
+    * Disk tier (optional): SQLite file that survives restarts; hits are promoted
+      to the memory tier.
+    * Warm tier: read-only table of precomputed common profiles (see
+      warm_profiles.py), never evicted.
+    """
+
+    def __init__(self, max_entries=4096, db_path=None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._warm = {}
+        self.warm_version = None
+        self._lock = threading.Lock()
+        self.warm_hits = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS assessments ('
+                'model_version TEXT NOT NULL, answers TEXT NOT NULL, payload TEXT NOT NULL, '
+                'PRIMARY KEY (model_version, answers))'
+            )
+            self._db.commit()
+
+    def get(self, answers, model_version):
+        """
+        Return the cached PredictionResult for these answers, or None.
+        """
+        key = (model_version, answers_key(answers))
+        with self._lock:
+            payload = self._warm.get(key)
+            if payload is not None:
+                self.warm_hits += 1
+                return PredictionResult.from_dict(payload, source='warm')
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return PredictionResult.from_dict(payload, source='memory')
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT payload FROM assessments WHERE model_version = ? AND answers = ?',
+                    (model_version, json.dumps(key[1])),
+                ).fetchone()
+                if row is not None:
+                    payload = json.loads(row[0])
+                    self._insert(key, payload)
+                    self.disk_hits += 1
+                    return PredictionResult.from_dict(payload, source='disk')
+            self.misses += 1
+            return None
+
+    def put(self, answers, model_version, result):
+        """
+        Store a freshly computed PredictionResult in both tiers.
+        """
+        key = (model_version, answers_key(answers))
+        payload = result.to_dict()
+        with self._lock:
+            self._insert(key, payload)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO assessments (model_version, answers, payload) VALUES (?, ?, ?)',
+                    (model_version, json.dumps(key[1]), json.dumps(payload)),
+                )
+                self._db.commit()
+
+    def seed(self, model_version, payloads):
+        """
+        Replace the warm tier with precomputed payloads (PredictionResult.to_dict()
+        form) that were produced by `model_version`.
+        """
+        warm = {(model_version, answers_key(payload['answers'])): payload for payload in payloads}
+        with self._lock:
+            self._warm = warm
+            self.warm_version = model_version
+
+    def clear(self):
+        """
+        Empty the memory tier; the warm and disk tiers and the counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _insert(self, key, payload):
+        self._entries[key] = payload
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """
+        Return the hit/miss counters of the cache.
+        """
+        served = self.warm_hits + self.hits + self.disk_hits
+        lookups = served + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'warm_entries': len(self._warm),
+            'warm_hits': self.warm_hits,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': served / lookups if lookups else 0.0,
+        }
+
+
+def cached_assess(cache, answers, model_version, model, encoder, explainer_pool, inference_pool=None):
+    """
+    Serve an assessment from the cache, running the pipeline only on a miss.
+    On a miss the pipeline runs in this thread, or in a worker process when an
+    `inference_pool` (see worker_pool.py) is given. A worker result is cached
+    under the version the workers were forked with, so a pool that has not been
+    replaced yet after a model reload never fills the new version's entries.
+    Returns:
+    PredictionResult: `source` tells whether it came from 'warm', 'memory', 'disk',
+    the 'model' or a 'worker'.
+    """
+    result = cache.get(answers, model_version)
+    if result is not None:
+        metrics.record_result(result, observe_stages=False)
+        return result
+    if inference_pool is not None:
+        # The pipeline stages run (and are timed) in the worker; count the round trip here:
+        with metrics.time_stage('worker'):
+            result = inference_pool.assess([answers])[0]
+        computed_by = inference_pool.model_version
+    else:
+        result = assess(answers, model, encoder, explainer_pool)
+        computed_by = model_version
+    metrics.record_result(result)
+    cache.put(answers, computed_by, result)
+    return result
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_assessment_cache():
+    """
+    Return the process-wide cache. Its size and optional SQLite file are read from
+    the HEART_CACHE_SIZE and HEART_CACHE_DB environment variables.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AssessmentCache(
+                    max_entries=int(os.environ.get('HEART_CACHE_SIZE', 4096)),
+                    db_path=os.environ.get('HEART_CACHE_DB') or None,
+                )
+    return _cache
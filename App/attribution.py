@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+
+from explainers import positive_class
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _expected_value(explainer):
+    expected_value = explainer.expected_value
+    # Binary LightGBM explainers may report one base value per class:
+    if np.ndim(expected_value) > 0:
+        expected_value = np.asarray(expected_value).ravel()[-1]
+    return float(expected_value)
+
+
+class Attribution:
+    """
+    Ensemble-wide contributions for a batch of encoded rows.
+    Attributes:
+    contributions (np.ndarray): (n_rows, n_features) contributions in probability
+        units; each row sums to `probabilities - base_value`.
+    base_value (float): Mean member probability at the explainers' base values.
+    probabilities (np.ndarray): Ensemble probability of class 1 rebuilt from the members.
+    n_members (int): Number of members that were explained.
+    seconds (float): Wall time of the attribution pass.
+    """
+
+    def __init__(self, contributions, base_value, probabilities, n_members, seconds):
+        self.contributions = contributions
+        self.base_value = base_value
+        self.probabilities = probabilities
+        self.n_members = n_members
+        self.seconds = seconds
+
+    def importance_percent(self):
+        """
+        Share of each feature in the absolute contributions of its row, in percent
+        (the normalization the app uses for the pie chart and recommendations).
+        """
+        importances = np.abs(self.contributions)
+        totals = importances.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+        return importances / totals * 100
+
+
+def ensemble_attribution(pool, X):
+    """
+    Explain the EasyEnsemble output for a batch of rows with every member at once.
+    `predict_proba` averages the member probabilities, so each member's SHAP
+    values (log-odds units) are first rescaled to that member's probability
+    change and then averaged. The result adds up exactly to the served score,
+    instead of describing `estimators_[0]` only.
+    Each member is explained with a single call over the whole batch.
+    Parameters:
+    pool (ExplainerPool): Prebuilt explainers, one per member.
+    X (pd.DataFrame or np.ndarray): Encoded rows.
+    Returns:
+    Attribution: Averaged contributions and timing of the pass.
+    """
+    start = time.perf_counter()
+    n_rows = X.shape[0]
+    contributions = np.zeros((n_rows, pool.n_features))
+    probabilities = np.zeros(n_rows)
+    base_value = 0.0
+
+    X = np.asarray(X)
+    for explainer, features in zip(pool.explainers, pool.feature_indices):
+        # Each member sees the columns in its own order (see ensemble_feature_indices):
+        phi = np.asarray(positive_class(explainer.shap_values(X[:, features])), dtype=float)
+        expected = _expected_value(explainer)
+        raw = expected + phi.sum(axis=1)
+        p = _sigmoid(raw)
+        p0 = _sigmoid(expected)
+        delta = raw - expected
+        # Rescale log-odds contributions to probability units; fall back to the
+        # sigmoid slope when the row sits on the base value:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(np.abs(delta) > 1e-12, (p - p0) / delta, p0 * (1 - p0))
+        contributions[:, features] += phi * scale[:, None]
+        probabilities += p
+        base_value += p0
+
+    n_members = len(pool.explainers)
+    contributions /= n_members
+    probabilities /= n_members
+    base_value /= n_members
+    return Attribution(contributions, base_value, probabilities, n_members, time.perf_counter() - start)
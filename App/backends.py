@@ -0,0 +1,191 @@
+import os
+
+from resources import check_source, get_model, model_version, registry, source_version
+
+# name -> function returning an object with `predict_proba(encoded) -> (n_rows, 2)`,
+# or `predict_proba_answers(answers) -> (n_rows, 2)` for backends embedding the encoder
+BACKENDS = {}
+# name -> function returning the version string of what the backend serves
+VERSIONS = {}
+# name -> function returning the FrozenEncoder the backend's rows are encoded with
+ENCODERS = {}
+# name -> function returning (ensemble whose members SHAP explains, its sha256)
+EXPLAINED = {}
+
+
+def _frozen_encoder():
+    from fast_encoder import get_frozen_encoder
+
+    return get_frozen_encoder()
+
+
+def _pickled_model():
+    return get_model(), registry.fingerprint('model')
+
+
+def register_backend(name, loader, version=None, encoder=None, explained=None):
+    """
+    Parameters:
+    name (str): Backend name (HEART_BACKEND value).
+    loader (callable): Returns the backend object.
+    version (callable, optional): Returns the version keying the backend's cached
+        and precomputed results; defaults to model_version() plus the backend name.
+    encoder (callable, optional): Returns the backend's FrozenEncoder; defaults to
+        the one frozen from cbe_encoder.pkl (needs category_encoders and pandas).
+    explained (callable, optional): Returns (ensemble, sha256) for the SHAP
+        explanations; defaults to the pickled model.
+    """
+    BACKENDS[name] = loader
+    VERSIONS[name] = version or (lambda: f'{model_version()}-{name}')
+    ENCODERS[name] = encoder or _frozen_encoder
+    EXPLAINED[name] = explained or _pickled_model
+
+
+def get_backend(name=None):
+    """
+    Return the scoring backend used for the risk score.
+    The SHAP contributions come from the pickled model's members, or from the
+    bundle's boosters for the 'bundle' backend (see `get_explained_model`).
+    Parameters:
+    name (str, optional): Backend name; defaults to HEART_BACKEND, then 'pickle'.
+    """
+    name = name or os.environ.get('HEART_BACKEND', 'pickle')
+    if name not in BACKENDS:
+        raise ValueError(f'unknown scoring backend {name!r} (available: {sorted(BACKENDS)})')
+    return BACKENDS[name]()
+
+
+def get_backend_encoder(name=None):
+    """
+    Return the FrozenEncoder to use with the backend `name` (default HEART_BACKEND).
+    """
+    name = name or os.environ.get('HEART_BACKEND', 'pickle')
+    if name not in ENCODERS:
+        raise ValueError(f'unknown scoring backend {name!r} (available: {sorted(BACKENDS)})')
+    return ENCODERS[name]()
+
+
+def get_explained_model(name=None):
+    """
+    Return (ensemble, sha256 of its artifact) whose members explain the risk of
+    the backend `name` (default HEART_BACKEND); see explainers.get_explainer_pool.
+    """
+    name = name or os.environ.get('HEART_BACKEND', 'pickle')
+    if name not in EXPLAINED:
+        raise ValueError(f'unknown scoring backend {name!r} (available: {sorted(BACKENDS)})')
+    return EXPLAINED[name]()
+
+
+def backend_version(name=None):
+    """
+    Version of the results a backend produces, used for the assessment cache,
+    the warm-profile table, the inference workers and the metrics. It is
+    model_version() for the pickled model; exports add the backend name and the
+    sha256 prefix of the exported artifact to the version of the pickles they
+    were exported from, so float32 or approximate results never share keys with
+    exact ones and a stale export never serves under a new model's version.
+    """
+    name = name or os.environ.get('HEART_BACKEND', 'pickle')
+    if name not in VERSIONS:
+        raise ValueError(f'unknown scoring backend {name!r} (available: {sorted(BACKENDS)})')
+    return VERSIONS[name]()
+
+
+def export_version(backend, source, artifact):
+    """
+    Version of an export: `source` (digests recorded in it), the backend name and
+    the digest of the registered `artifact`.
+    """
+    return f'{source_version(source)}-{backend}-{registry.digest(artifact)[:12]}'
+
+
+def _load_onnx(path):
+    from onnx_export import OnnxBackend
+
+    backend = OnnxBackend(path)
+    check_source(backend.source, path)
+    return backend
+
+
+def _bundle():
+    from model_bundle import get_bundle
+
+    return get_bundle()
+
+
+def _load_early_exit():
+    from early_exit import get_early_exit_model
+
+    return get_early_exit_model()
+
+
+def _load_flat(path):
+    from flat_trees import FlatEnsemble
+
+    flat = FlatEnsemble.load(path)
+    check_source(flat.source, path)
+    return flat
+
+
+def _load_flat_encoder(path):
+    from fast_encoder import FrozenEncoder
+
+    encoder = FrozenEncoder.load(path)
+    check_source(encoder.source, path)
+    return encoder
+
+
+def _flat_encoder():
+    encoder = registry.get('flat_encoder')
+    if encoder.source != registry.get('flat_model').source:
+        raise ValueError('frozen_encoder.npz and flat_model.npz come from different exports; run `python flat_trees.py`')
+    return encoder
+
+
+# The pickled EasyEnsembleClassifier (imblearn + sklearn + lightgbm):
+register_backend('pickle', get_model, model_version)
+
+# Flattened NumPy trees and encoder tables exported by `python flat_trees.py`
+# (NumPy only: no pickle is loaded to score):
+registry.register('flat_model', 'flat_model.npz', _load_flat)
+registry.register('flat_encoder', 'frozen_encoder.npz', _load_flat_encoder)
+register_backend('flat', lambda: registry.get('flat_model'),
+                 lambda: export_version('flat', registry.get('flat_model').source, 'flat_model'),
+                 _flat_encoder)
+
+# Native LightGBM members and encoder arrays from the versioned bundle written by
+# `python model_bundle.py`; scores, encodes and explains with it (lightgbm only,
+# no unpickling):
+register_backend('bundle', lambda: _bundle()[0],
+                 lambda: export_version('bundle', _bundle()[2]['source'], 'model_bundle'),
+                 lambda: _bundle()[1],
+                 lambda: (_bundle()[0], registry.fingerprint('model_bundle')))
+
+# Approximate scoring that stops once the risk band is settled (batch screening;
+# error bound HEART_EARLY_EXIT_EPS, part of its version, see early_exit.py):
+register_backend('early_exit', _load_early_exit,
+                 lambda: f'{model_version()}-early_exit-eps{_load_early_exit().eps:g}')
+
+# Encoder + ensemble as one ONNX graph exported by `python onnx_export.py`
+# (onnxruntime; scores the raw answers in float32, hence its own version):
+registry.register('onnx_model', 'heart_model.onnx', _load_onnx)
+register_backend('onnx', lambda: registry.get('onnx_model'),
+                 lambda: export_version('onnx', registry.get('onnx_model').source, 'onnx_model'))
+
+
+def predict_positive(model, encoded, answers):
+    """
+    Class 1 probability of a batch with any backend.
+    Parameters:
+    model: A backend from `get_backend`.
+    encoded (np.ndarray): The rows encoded by the frozen encoder.
+    answers (list or dict): The same rows as answer dicts, or as feature -> array of
+        answers; used by backends that embed the encoder (ONNX).
+    Returns:
+    np.ndarray: (n_rows,) probabilities.
+    """
+    if hasattr(model, 'predict_proba_answers'):
+        return model.predict_proba_answers(answers)[:, 1]
+    from thread_budget import budget
+
+    return budget.predict_proba(model, encoded)[:, 1]
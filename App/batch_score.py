@@ -0,0 +1,168 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backends import predict_positive
+from early_exit import EarlyExitEnsemble
+from recommendations import risk_band
+from schema import FEATURES
+
+# Per-worker state, loaded once by `_init_worker` and reused for every chunk:
+_worker = {}
+
+
+def _init_worker(with_contributions, threads_per_worker):
+    from backends import get_backend, get_backend_encoder
+    from thread_budget import budget
+
+    budget.max_threads = threads_per_worker
+
+    # With HEART_BACKEND=flat and no contributions this loads .npz files only
+    # (no lightgbm, sklearn, category_encoders or pickle):
+    _worker['model'] = get_backend()
+    _worker['encoder'] = get_backend_encoder()
+    # Workers split the cores between them instead of each using all of them
+    # (after the model load, so LightGBM's OpenMP runtime is capped too):
+    budget.cap_process()
+    if with_contributions:
+        from explainers import get_explainer_pool
+
+        _worker['explainer_pool'] = get_explainer_pool()
+
+
+def score_chunk(columns, top_k=0):
+    """
+    Score one chunk inside a worker.
+    Parameters:
+    columns (dict): feature -> array of answers for the rows of the chunk.
+    top_k (int): Number of top contributing features to return per row (0 = none).
+    Returns:
+    tuple: (risk in percent (n_rows,), top feature indices (n_rows, top_k) or None,
+            top importance shares in percent (n_rows, top_k) or None,
+            ensemble members evaluated per row (n_rows,) with early exit, else None)
+    """
+    model = _worker['model']
+    encoded = _worker['encoder'].encode_columns(columns)
+    members_used = None
+    if isinstance(model, EarlyExitEnsemble):
+        positive, members_used = model.predict(encoded)
+        risks = positive * 100
+    else:
+        risks = predict_positive(model, encoded, columns) * 100
+    if not top_k:
+        return risks, None, None, members_used
+
+    from attribution import ensemble_attribution
+
+    shares = ensemble_attribution(_worker['explainer_pool'], encoded).importance_percent()
+    top = np.argsort(-shares, axis=1)[:, :top_k]
+    return risks, top, np.take_along_axis(shares, top, axis=1), members_used
+
+
+def read_chunks(path, chunk_size, extra_columns=()):
+    """
+    Stream the input file in chunks of at most `chunk_size` rows.
+    CSV is read with `pd.read_csv(chunksize=...)`, Parquet batch by batch with
+    pyarrow, so memory stays bounded by the chunk size whatever the file size.
+    Yields:
+    pd.DataFrame: FEATURES (as strings) plus `extra_columns`.
+    """
+    columns = list(extra_columns) + FEATURES
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, dtype=str, chunksize=chunk_size)
+
+
+def format_chunk(chunk, risks, top, top_shares, members_used, extra_columns):
+    out = pd.DataFrame({column: chunk[column].to_numpy() for column in extra_columns})
+    out['risk'] = np.round(risks, 4)
+    out['risk_band'] = [risk_band(risk) for risk in risks]
+    if members_used is not None:
+        out['members_used'] = members_used
+    if top is not None:
+        names = np.asarray(FEATURES)
+        for k in range(top.shape[1]):
+            out[f'top{k + 1}_feature'] = names[top[:, k]]
+            out[f'top{k + 1}_share'] = np.round(top_shares[:, k], 2)
+    return out
+
+
+def run(input_path, output_path, chunk_size=50000, workers=None, top_k=0, id_column=None, log=sys.stderr):
+    """
+    Score `input_path` into `output_path` with a process pool.
+    Each worker loads the model and encoder once; chunks are fanned out with at
+    most two chunks in flight per worker and written in input order as soon as
+    they are done. With HEART_BACKEND=early_exit every row also gets the
+    number of ensemble members evaluated for it (`members_used`).
+    Returns:
+    dict: {'rows', 'seconds', 'rows_per_second', 'workers', 'mean_members_used'
+           (None without early exit)}
+    """
+    workers = workers or os.cpu_count()
+    extra_columns = [id_column] if id_column else []
+    start = time.perf_counter()
+    rows = 0
+    member_evaluations = None
+    header = True
+
+    def write(chunk, future):
+        nonlocal rows, member_evaluations, header
+        risks, top, top_shares, members_used = future.result()
+        format_chunk(chunk, risks, top, top_shares, members_used, extra_columns).to_csv(
+            output_path, mode='w' if header else 'a', header=header, index=False
+        )
+        header = False
+        rows += len(chunk)
+        if members_used is not None:
+            member_evaluations = (member_evaluations or 0) + int(members_used.sum())
+        elapsed = time.perf_counter() - start
+        print(f'{rows} rows scored, {rows / elapsed:,.0f} rows/s', file=log)
+
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(top_k > 0, threads_per_worker)) as pool:
+        in_flight = []
+        for chunk in read_chunks(input_path, chunk_size, extra_columns):
+            columns = {feature: chunk[feature].to_numpy(dtype=str) for feature in FEATURES}
+            in_flight.append((chunk, pool.submit(score_chunk, columns, top_k)))
+            # Bounded queue: wait for the oldest chunk before reading more of the file
+            while len(in_flight) >= 2 * workers:
+                write(*in_flight.pop(0))
+        for chunk, future in in_flight:
+            write(chunk, future)
+
+    seconds = time.perf_counter() - start
+    return {'rows': rows, 'seconds': seconds, 'rows_per_second': rows / seconds if seconds else 0.0, 'workers': workers,
+            'mean_members_used': member_evaluations / rows if member_evaluations is not None and rows else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a respondent file with the served heart disease model.')
+    parser.add_argument('input', help='CSV or .parquet file with the 22 answer columns.')
+    parser.add_argument('output', help='CSV file to write the scores to.')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Rows per chunk (bounds memory).')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores).')
+    parser.add_argument('--top-contributions', type=int, default=0,
+                        help='Also write the N features contributing most to each risk.')
+    parser.add_argument('--id-column', default=None, help='Input column copied to the output to identify rows.')
+    args = parser.parse_args()
+
+    stats = run(args.input, args.output, args.chunk_size, args.workers, args.top_contributions, args.id_column)
+    print(f"Scored {stats['rows']} rows in {stats['seconds']:.1f}s with {stats['workers']} workers "
+          f"({stats['rows_per_second']:,.0f} rows/s)")
+    if stats['mean_members_used'] is not None:
+        print(f"Early exit: {stats['mean_members_used']:.2f} ensemble members evaluated per row on average")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import time
+
+import numpy as np
+
+from early_exit import EarlyExitEnsemble, band_index
+from schema import FEATURES
+
+
+def test_split(seed=1981):
+    """
+    The BRFSS test split of Modeling.py: train_test_split(test_size=0.20, random_state=1981)
+    over the rows of the wrangled dataset, in file order.
+    Returns:
+    tuple: (answer columns dict of the test rows, 0/1 target array)
+    """
+    from sklearn.model_selection import train_test_split
+
+    from reference_data import TARGET, read_columns
+
+    df = read_columns(FEATURES + [TARGET])
+    _, test_rows = train_test_split(np.arange(len(df)), test_size=0.20, random_state=seed)
+    test = df.iloc[test_rows]
+    return {feature: test[feature].to_numpy(dtype=str) for feature in FEATURES}, test[TARGET].to_numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Accuracy versus speed of early-exit ensemble scoring.')
+    parser.add_argument('--eps', type=float, nargs='+', default=[0.02, 0.05, 0.1, 0.2, 0.3, 1.0])
+    parser.add_argument('--rows', type=int, default=0, help='Score only the first N test rows (0 = all).')
+    args = parser.parse_args()
+
+    from sklearn.metrics import roc_auc_score
+
+    from fast_encoder import get_frozen_encoder
+    from resources import get_model
+    from thread_budget import budget
+
+    columns, y = test_split()
+    X = get_frozen_encoder().encode_columns(columns)
+    if args.rows:
+        X, y = X[:args.rows], y[:args.rows]
+    model = get_model()
+
+    start = time.perf_counter()
+    full = budget.predict_proba(model, X)[:, 1]
+    full_seconds = time.perf_counter() - start
+    full_bands = band_index(full)
+    print(f'{len(X)} test rows, {len(model.estimators_)} members')
+    print(f"{'mode':<16} {'rows/s':>10} {'speedup':>8} {'members':>8} {'band agree':>11} "
+          f"{'max |diff|':>11} {'ROC AUC':>8}")
+    print(f"{'all members':<16} {len(X) / full_seconds:10,.0f} {1.0:8.2f} {len(model.estimators_):8.2f} "
+          f"{100.0:10.2f}% {0.0:11.4f} {roc_auc_score(y, full):8.4f}")
+
+    for eps in args.eps:
+        early = EarlyExitEnsemble(model, eps=eps)
+        start = time.perf_counter()
+        approx, used = early.predict(X)
+        seconds = time.perf_counter() - start
+        agree = (band_index(approx) == full_bands).mean() * 100
+        print(f"{f'eps={eps:g}':<16} {len(X) / seconds:10,.0f} {full_seconds / seconds:8.2f} {used.mean():8.2f} "
+              f"{agree:10.2f}% {np.abs(approx - full).max():11.4f} {roc_auc_score(y, approx):8.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+
+from pie_chart import PieFigureCache
+from recommendations import RULES
+
+
+def px_pie(labels, values):
+    """
+    The previous per-click path of heart_app.py: a DataFrame and a plotly.express figure.
+    """
+    import pandas as pd
+    import plotly.express as px
+
+    pie_df = pd.DataFrame({'Feature': labels, 'Importance': values})
+    return px.pie(pie_df, names='Feature', values='Importance')
+
+
+def time_per_call(func, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n * 1000
+
+
+def main(n=200, n_rules=8, seed=1981):
+    rng = np.random.default_rng(seed)
+    labels = [rule.display_name for rule in RULES[:n_rules]] + ['Other Factors']
+    # A fresh contribution vector per call for the uncached paths:
+    vectors = [rng.dirichlet(np.ones(len(labels))) * 100 for _ in range(n)]
+    px_pie(labels, vectors[0])  # import plotly.express outside the timings
+
+    uncached = PieFigureCache(max_entries=0)
+    cached = PieFigureCache()
+    cached.figure(labels, vectors[0])
+
+    calls = iter(range(10 ** 9))
+    px_ms = time_per_call(lambda: px_pie(labels, vectors[next(calls) % n]), n)
+    calls = iter(range(10 ** 9))
+    arrays_ms = time_per_call(lambda: uncached.figure(labels, vectors[next(calls) % n]), n)
+    hit_ms = time_per_call(lambda: cached.figure(labels, vectors[0]), n)
+    print(f'Contribution pie chart ({len(labels)} slices):')
+    print(f'  px.pie(pie_df)          : {px_ms:8.3f} ms')
+    print(f'  go.Pie + layout template: {arrays_ms:8.3f} ms  ({px_ms / arrays_ms:.1f}x faster)')
+    print(f'  cache hit               : {hit_ms:8.3f} ms  ({px_ms / hit_ms:.0f}x faster)')
+
+
+if __name__ == '__main__':
+    main()
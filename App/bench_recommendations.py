@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from recommendations import RULES, build_recommendations
+from schema import FEATURES
+
+# Answers that trigger every rule, so both paths do their maximum amount of work:
+WORST_CASE_ANSWERS = {feature: 'other' for feature in FEATURES}
+for rule in RULES:
+    WORST_CASE_ANSWERS[rule.feature] = sorted(rule.categories)[0] if rule.categories is not None else 'other'
+
+
+def scan_recommendations(risk, answers, feature_importance_df):
+    """
+    The previous per-request pattern of heart_app.py: one
+    `feature_importance_df.loc[feature_importance_df['Feature'] == feature]` scan per
+    triggered feature for the message, again for the 'Other Factors' total, again
+    for the pie values and again as the sort key.
+    """
+    if risk <= 25:
+        return [], {}
+    lookup = lambda feature: feature_importance_df.loc[feature_importance_df['Feature'] == feature, 'Importance'].values[0]
+    final_features = []
+    feature_to_recommendation = {}
+    for rule in RULES:
+        if rule.triggers(answers[rule.feature]):
+            importance = lookup(rule.feature)
+            feature_to_recommendation[rule.feature] = rule.template.format(importance=importance)
+            final_features.append(rule.feature)
+    total_importance = sum([lookup(feature) for feature in final_features])
+    pie_data = {
+        'Feature': [rule.display_name for rule in RULES if rule.feature in final_features] + ['Other Factors'],
+        'Importance': [lookup(feature) for feature in final_features] + [100 - total_importance],
+    }
+    sorted_recommendations = sorted(
+        [(feature, feature_to_recommendation[feature]) for feature in final_features],
+        key=lambda x: lookup(x[0]), reverse=True,
+    )
+    return sorted_recommendations, pie_data
+
+
+def time_per_call(func, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main(n=2000, risk=55.0, seed=1981):
+    rng = np.random.default_rng(seed)
+    shares = rng.random(len(FEATURES))
+    importances = dict(zip(FEATURES, (shares / shares.sum() * 100).tolist()))
+    feature_importance_df = pd.DataFrame(
+        sorted(importances.items(), key=lambda item: item[1], reverse=True), columns=['Feature', 'Importance']
+    )
+
+    scan_us = time_per_call(lambda: scan_recommendations(risk, WORST_CASE_ANSWERS, feature_importance_df), n)
+    table_us = time_per_call(lambda: build_recommendations(risk, WORST_CASE_ANSWERS, importances), n)
+    print(f'Recommendations per request ({len(RULES)} triggered rules):')
+    print(f'  DataFrame .loc scans : {scan_us:9.1f} us')
+    print(f'  rule table + dict    : {table_us:9.1f} us  ({scan_us / table_us:.0f}x faster)')
+
+
+if __name__ == '__main__':
+    main()
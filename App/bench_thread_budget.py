@@ -0,0 +1,66 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from fast_encoder import get_frozen_encoder, parity_answers
+from resources import artifact_path, load_pickle
+from thread_budget import ThreadBudget
+
+
+def run_sessions(predict, rows, concurrency, duration):
+    """
+    Run `concurrency` threads that each score single rows back to back for
+    `duration` seconds, like concurrent app sessions.
+    Returns:
+    np.ndarray: Latency of every call, in milliseconds.
+    """
+    latencies = [[] for _ in range(concurrency)]
+    deadline = time.perf_counter() + duration
+
+    def session(i):
+        k = i
+        while time.perf_counter() < deadline:
+            row = rows[k % len(rows)]
+            start = time.perf_counter()
+            predict(row)
+            latencies[i].append((time.perf_counter() - start) * 1000)
+            k += concurrency
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.concatenate([np.asarray(values) for values in latencies])
+
+
+def report(label, latencies, duration):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f'  {label:<32} {len(latencies) / duration:8.0f} req/s   '
+          f'p50 {p50:7.2f} ms   p95 {p95:7.2f} ms   p99 {p99:7.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='p99 of concurrent single-row predictions with and without the thread budget.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per scenario.')
+    args = parser.parse_args()
+
+    encoder = get_frozen_encoder()
+    rows = [encoder.encode_one(answers) for answers in parity_answers(encoder, n_random=500)]
+
+    # Two independent copies of the model: as pickled (n_jobs=-1) and as served.
+    untuned = load_pickle(artifact_path('best_model.pkl'))
+    budget = ThreadBudget()
+    served = budget.configure_model(load_pickle(artifact_path('best_model.pkl')))
+
+    for concurrency in args.concurrency:
+        print(f'{concurrency} concurrent sessions:')
+        report('pickled model (n_jobs=-1)', run_sessions(untuned.predict_proba, rows, concurrency, args.duration), args.duration)
+        report('thread budget', run_sessions(lambda row: budget.predict_proba(served, row), rows, concurrency, args.duration), args.duration)
+
+
+if __name__ == '__main__':
+    main()
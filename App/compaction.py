@@ -0,0 +1,92 @@
+import os
+import pickle as pkl
+
+from model_bundle import BundleEnsemble, BundleMember
+
+COMPACT_MODEL = 'best_model.compact.pkl'
+
+
+def compact_booster(booster):
+    """
+    Rebuild a booster from its model text alone, so nothing from training
+    (datasets, evaluation history, sklearn wrapper state) comes along.
+    """
+    import lightgbm as lgb
+
+    objective = booster.params.get('objective', 'binary')
+    return lgb.Booster(params={'objective': objective}, model_str=booster.model_to_string())
+
+
+def compact_model(model):
+    """
+    Strip the fitted EasyEnsembleClassifier down to what predict_proba and SHAP use.
+    The imblearn Pipelines, their RandomUnderSamplers (and the sampled indices
+    they keep), the LGBMClassifier wrappers and the bagging bookkeeping are
+    dropped; what remains is one LightGBM booster per member plus the columns
+    each member was fitted on.
+    Returns:
+    BundleEnsemble: Boosters-only ensemble (see model_bundle.py) with the same
+        predict_proba, `estimators_` and `estimators_features_`.
+    """
+    from explainers import ensemble_feature_indices, ensemble_members
+
+    members = [BundleMember(compact_booster(member.booster_)) for member in ensemble_members(model)]
+    return BundleEnsemble(members, ensemble_feature_indices(model), manifest=None)
+
+
+def write_compact_model(model, path):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pkl.dump(compact_model(model), f, protocol=pkl.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def rss_mb():
+    """
+    Current resident memory of this process in MB (Linux; None elsewhere).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except OSError:
+        return None
+
+
+if __name__ == '__main__':
+    # Write best_model.compact.pkl, check parity and compare load time and RSS
+    # of the two artifacts, each in a fresh interpreter:
+    import json
+    import subprocess
+    import sys
+
+    import numpy as np
+
+    from fast_encoder import get_frozen_encoder, parity_answers
+    from resources import artifact_path, get_model
+
+    model = get_model()
+    path = artifact_path(COMPACT_MODEL)
+    write_compact_model(model, path)
+    encoder = get_frozen_encoder()
+    X = encoder.encode_records(parity_answers(encoder))
+    with open(path, 'rb') as f:
+        compact = pkl.load(f)
+    max_diff = float(np.abs(model.predict_proba(X)[:, 1] - compact.predict_proba(X)[:, 1]).max())
+    print(f'Parity with best_model.pkl: max abs diff {max_diff:.2e}')
+
+    measure = (
+        'import json, sys, time\n'
+        'from compaction import rss_mb\n'
+        'import lightgbm, numpy\n'  # both paths need them; keep their import out of the comparison
+        'before = rss_mb()\n'
+        'start = time.perf_counter()\n'
+        'from resources import load_pickle\n'
+        'model = load_pickle(sys.argv[1])\n'
+        'print(json.dumps({"seconds": time.perf_counter() - start, "rss_mb": rss_mb() - before}))\n'
+    )
+    for file_name in ('best_model.pkl', COMPACT_MODEL):
+        done = subprocess.run([sys.executable, '-c', measure, artifact_path(file_name)], cwd=os.path.dirname(path),
+                              capture_output=True, text=True, check=True)
+        stats = json.loads(done.stdout)
+        print(f'{file_name:<24} {os.path.getsize(artifact_path(file_name)) / 1e6:7.2f} MB on disk  '
+              f'load {stats["seconds"] * 1000:8.1f} ms  RSS +{stats["rss_mb"]:7.1f} MB')
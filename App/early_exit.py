@@ -0,0 +1,114 @@
+import os
+import threading
+
+import numpy as np
+
+from recommendations import RISK_BANDS
+
+# Band boundaries of the app as probabilities (0.25, 0.40, 0.70):
+BOUNDARIES = np.array(sorted(bound / 100 for bound, _ in RISK_BANDS))
+
+
+def band_index(probabilities):
+    """
+    Band of each probability as 0 (low) .. 3 (very high), like recommendations.risk_band.
+    """
+    return np.searchsorted(BOUNDARIES, probabilities, side='left')
+
+
+class EarlyExitEnsemble:
+    """
+    Approximate EasyEnsemble scoring that stops evaluating members once the risk
+    band is settled.
+    Members are evaluated in `estimators_` order. After k of n members the
+    running mean m_k is taken to be within `eps` of every remaining member, so
+    the full mean lies in m_k +/- eps * (n - k) / n. A row stops as soon as that
+    interval contains no band boundary; its score is then the running mean.
+    eps=1.0 makes the band exact (member probabilities lie in [0, 1]); smaller
+    values trade band accuracy for speed. Meant for batch screening where only
+    the band matters: the app keeps scoring with every member.
+    Parameters:
+    model: The ensemble (pickled EasyEnsembleClassifier or a boosters-only one).
+    eps (float): Assumed largest gap between a remaining member and the running mean.
+    min_members (int): Members always evaluated before a row may stop.
+    """
+
+    def __init__(self, model, eps=0.1, min_members=2):
+        from explainers import ensemble_feature_indices, ensemble_members
+
+        self.model = model
+        self.members = ensemble_members(model)
+        self.feature_indices = ensemble_feature_indices(model)
+        self.eps = eps
+        self.min_members = max(1, min(min_members, len(self.members)))
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.member_evaluations = 0
+
+    def predict(self, X):
+        """
+        Score a batch with early exit.
+        Parameters:
+        X (np.ndarray): (n_rows, n_features) encoded matrix.
+        Returns:
+        tuple: (class 1 probabilities (n_rows,), members used per row (n_rows,) int)
+        """
+        from thread_budget import budget
+
+        X = np.asarray(X)
+        n_members = len(self.members)
+        totals = np.zeros(X.shape[0])
+        used = np.zeros(X.shape[0], dtype=np.int64)
+        active = np.arange(X.shape[0])
+        for k, (member, features) in enumerate(zip(self.members, self.feature_indices), start=1):
+            rows = X[active][:, features]
+            totals[active] += member.booster_.predict(rows, num_threads=budget.threads_for(len(active)))
+            used[active] = k
+            if k < self.min_members or k == n_members:
+                continue
+            mean = totals[active] / k
+            half_width = self.eps * (n_members - k) / n_members
+            # Rows whose closed interval holds no boundary are settled (a full mean
+            # landing exactly on a boundary would otherwise change band):
+            crosses = ((BOUNDARIES[None, :] >= (mean - half_width)[:, None]) &
+                       (BOUNDARIES[None, :] <= (mean + half_width)[:, None])).any(axis=1)
+            active = active[crosses]
+            if not len(active):
+                break
+
+        with self._lock:
+            self.rows += X.shape[0]
+            self.member_evaluations += int(used.sum())
+        return totals / used, used
+
+    def predict_proba(self, X):
+        positive, _ = self.predict(X)
+        return np.column_stack([1 - positive, positive])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'eps': self.eps,
+                'members': len(self.members),
+                'rows': self.rows,
+                'mean_members_used': self.member_evaluations / self.rows if self.rows else None,
+            }
+
+
+_wrapped = None
+_wrapped_lock = threading.Lock()
+
+
+def get_early_exit_model():
+    """
+    Return the served model wrapped for early exit, with the error bound from
+    HEART_EARLY_EXIT_EPS (default 0.1). Rewrapped when the model is reloaded.
+    """
+    global _wrapped
+    from resources import get_model
+
+    model = get_model()
+    with _wrapped_lock:
+        if _wrapped is None or _wrapped.model is not model:
+            _wrapped = EarlyExitEnsemble(model, eps=float(os.environ.get('HEART_EARLY_EXIT_EPS', 0.1)))
+        return _wrapped
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import numpy as np
+
+
+def ensemble_members(model):
+    """
+    Return the fitted tree models that make up the served ensemble.
+    For the pickled EasyEnsembleClassifier every member is an imblearn Pipeline
+    whose last step is the LGBMClassifier.
+    Parameters:
+    model: The served model.
+    Returns:
+    list: One tree model per ensemble member, in `estimators_` order.
+    """
+    members = []
+    for estimator in model.estimators_:
+        if hasattr(estimator, 'steps'):
+            estimator = estimator.steps[-1][1]
+        members.append(estimator)
+    return members
+
+
+def ensemble_feature_indices(model):
+    """
+    Return, per member, the columns of the encoded matrix that member was fitted on.
+    Bagging ensembles (EasyEnsembleClassifier included) predict each member on
+    `X[:, model.estimators_features_[i]]`; with max_features=1.0 that is every
+    column, but not necessarily in the original order.
+    Returns:
+    list: One integer index array per member.
+    """
+    if hasattr(model, 'estimators_features_'):
+        return [np.asarray(features) for features in model.estimators_features_]
+    n_features = ensemble_members(model)[0].n_features_
+    return [np.arange(n_features) for _ in model.estimators_]
+
+
+def explained_model(member):
+    """
+    The object handed to `shap.TreeExplainer` for a member: the LGBMClassifier
+    itself, or the booster of members stripped of the sklearn wrapper
+    (compaction.py, model_bundle.py).
+    """
+    return member if hasattr(member, 'get_params') else member.booster_
+
+
+def positive_class(shap_values):
+    # For binary LightGBM models TreeExplainer returns one array per class:
+    if isinstance(shap_values, list):
+        return shap_values[1]
+    return shap_values
+
+
+class ExplainerPool:
+    """
+    One prebuilt `shap.TreeExplainer` per ensemble member.
+    Building a TreeExplainer walks every tree of the member, so the pool is built
+    once per loaded model and then reused by every request.
+    """
+
+    def __init__(self, model, model_version=None):
+        # shap (and numba/llvmlite behind it) is imported on first use, not with this module:
+        import shap
+
+        start = time.perf_counter()
+        self.model_version = model_version
+        self.members = ensemble_members(model)
+        self.feature_indices = ensemble_feature_indices(model)
+        self.explainers = [shap.TreeExplainer(explained_model(member)) for member in self.members]
+        self.n_features = self.members[0].n_features_
+        self.build_seconds = time.perf_counter() - start
+        self.warm_seconds = None
+
+    def warm(self):
+        """
+        Run every explainer once on a dummy row so lazily initialized state is
+        paid for at startup rather than by the first user.
+        """
+        start = time.perf_counter()
+        dummy = np.zeros((1, self.n_features))
+        for explainer in self.explainers:
+            explainer.shap_values(dummy)
+        self.warm_seconds = time.perf_counter() - start
+        return self
+
+    def __len__(self):
+        return len(self.explainers)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_explainer_pool(warm=True):
+    """
+    Return the process-wide explainer pool, (re)building and warming it when the
+    served model changes. It explains the members of backends.get_explained_model():
+    the pickled model, or the bundle's boosters with HEART_BACKEND=bundle.
+    Parameters:
+    warm (bool): Run the dummy row through the explainers. Pass False in a process
+        that is about to fork inference workers, so no OpenMP thread pool is started
+        before the fork (see worker_pool.py); the workers warm their own copy.
+    """
+    global _pool
+    from backends import get_explained_model
+
+    model, version = get_explained_model()
+    pool = _pool
+    if pool is not None and pool.model_version == version and (pool.warm_seconds is not None or not warm):
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.model_version != version:
+            _pool = ExplainerPool(model, model_version=version)
+        if warm and _pool.warm_seconds is None:
+            _pool.warm()
+        return _pool
@@ -0,0 +1,204 @@
+import numpy as np
+
+from resources import load_pickle, registry
+
+UNKNOWN = '__unknown__'
+
+
+class FrozenEncoder:
+    """
+    Array-backed replacement of the fitted CatBoostEncoder for inference.
+    Each column keeps its sorted vocabulary and a float table where slot `i` is the
+    encoded value of `vocabulary[i]` and the last slot is the value the encoder
+    gives to unknown or missing categories. Encoding is a dict lookup per answer
+    for single rows and a `np.searchsorted` per column for batches; no pandas.
+    `source` holds the sha256 of the pickles it was frozen from when it was
+    loaded from an export (see resources.source_digests).
+    """
+
+    def __init__(self, columns, vocabularies, tables, source=None):
+        self.columns = list(columns)
+        self.source = source
+        self.vocabularies = [np.asarray(vocab, dtype=str) for vocab in vocabularies]
+        self.tables = [np.asarray(table, dtype=np.float64) for table in tables]
+        self._index = [
+            {value: i for i, value in enumerate(vocab.tolist())} for vocab in self.vocabularies
+        ]
+
+    @classmethod
+    def freeze(cls, encoder):
+        """
+        Compile a fitted `category_encoders.CatBoostEncoder` into lookup tables.
+        The tables are read back from `encoder.transform` itself (every known
+        category plus one unseen value per column), so they match the library's
+        own prior/smoothing rules whatever its version.
+        Parameters:
+        encoder (ce.CatBoostEncoder): The fitted encoder (cbe_encoder.pkl).
+        Returns:
+        FrozenEncoder
+        """
+        import pandas as pd
+
+        columns = list(encoder.cols)
+        vocabularies = []
+        for col in columns:
+            categories = [value for value in encoder.mapping[col].index if isinstance(value, str)]
+            vocabularies.append(np.sort(np.asarray(categories, dtype=str)))
+
+        # One probe frame: column j lists its vocabulary followed by an unseen value,
+        # padded with its first category up to the longest vocabulary.
+        n_rows = max(len(vocab) for vocab in vocabularies) + 1
+        probe = {}
+        for col, vocab in zip(columns, vocabularies):
+            values = vocab.tolist() + [UNKNOWN]
+            probe[col] = values + [vocab[0]] * (n_rows - len(values))
+        encoded = encoder.transform(pd.DataFrame(probe, columns=columns))
+
+        tables = []
+        for col, vocab in zip(columns, vocabularies):
+            tables.append(encoded[col].to_numpy(dtype=np.float64)[:len(vocab) + 1])
+        return cls(columns, vocabularies, tables)
+
+    def encode_one(self, answers):
+        """
+        Encode a single answer dict.
+        Parameters:
+        answers (dict): feature -> category.
+        Returns:
+        np.ndarray: (1, n_features) float32 row in model column order.
+        """
+        row = np.empty((1, len(self.columns)), dtype=np.float32)
+        for j, col in enumerate(self.columns):
+            table = self.tables[j]
+            row[0, j] = table[self._index[j].get(answers.get(col), len(table) - 1)]
+        return row
+
+    def encode_records(self, answers_list):
+        """
+        Encode a list of answer dicts.
+        Returns:
+        np.ndarray: (n_rows, n_features) C-contiguous float32 matrix.
+        """
+        if len(answers_list) == 1:
+            return self.encode_one(answers_list[0])
+        return self.encode_columns({col: [answers.get(col) for answers in answers_list] for col in self.columns})
+
+    def encode_columns(self, columns):
+        """
+        Encode a batch given as arrays of answers.
+        Parameters:
+        columns (dict or np.ndarray): feature -> array of categories, or an
+            (n_rows, n_features) array of categories in `self.columns` order.
+        Returns:
+        np.ndarray: (n_rows, n_features) C-contiguous float32 matrix.
+        """
+        if isinstance(columns, dict):
+            arrays = [np.asarray(columns[col]) for col in self.columns]
+        else:
+            matrix = np.asarray(columns)
+            arrays = [matrix[:, j] for j in range(matrix.shape[1])]
+
+        n_rows = len(arrays[0])
+        out = np.empty((n_rows, len(self.columns)), dtype=np.float32)
+        for j, values in enumerate(arrays):
+            vocab = self.vocabularies[j]
+            values = values.astype(str)
+            idx = np.searchsorted(vocab, values)
+            np.clip(idx, 0, len(vocab) - 1, out=idx)
+            # Anything not in the vocabulary (including missing) uses the unknown slot:
+            idx[vocab[idx] != values] = len(vocab)
+            out[:, j] = self.tables[j][idx]
+        return out
+
+    def save(self, path):
+        """
+        Save the tables (and `source`, if set) to an .npz file, which `load`
+        reads back with NumPy alone: no pickle, category_encoders or pandas.
+        """
+        arrays = {'columns': np.asarray(self.columns, dtype=str)}
+        for j in range(len(self.columns)):
+            arrays[f'vocab_{j}'] = self.vocabularies[j]
+            arrays[f'table_{j}'] = self.tables[j]
+        for key, value in (self.source or {}).items():
+            arrays[f'source_{key}'] = np.asarray(value)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            columns = data['columns'].tolist()
+            vocabularies = [data[f'vocab_{j}'] for j in range(len(columns))]
+            tables = [data[f'table_{j}'] for j in range(len(columns))]
+            source = {name[len('source_'):]: str(data[name]) for name in data.files if name.startswith('source_')}
+        return cls(columns, vocabularies, tables, source=source or None)
+
+
+def check_parity(encoder, frozen, answers_list, atol=1e-6):
+    """
+    Compare the frozen encoder with `encoder.transform` on the given answers.
+    Parameters:
+    encoder (ce.CatBoostEncoder): The fitted encoder.
+    frozen (FrozenEncoder): Its frozen counterpart.
+    answers_list (list): Answer dicts to compare on.
+    atol (float): Allowed absolute difference (float32 rounding).
+    Returns:
+    float: Largest absolute difference; raises AssertionError above `atol`.
+    """
+    import pandas as pd
+
+    expected = encoder.transform(pd.DataFrame(answers_list, columns=frozen.columns)).to_numpy(dtype=np.float64)
+    batch = frozen.encode_records(answers_list).astype(np.float64)
+    single = np.vstack([frozen.encode_one(answers) for answers in answers_list]).astype(np.float64)
+    max_diff = max(np.abs(expected - batch).max(), np.abs(expected - single).max())
+    if max_diff > atol:
+        raise AssertionError(f'frozen encoder differs from encoder.transform by {max_diff}')
+    return max_diff
+
+
+def parity_answers(frozen, n_random=2000, seed=1981):
+    """
+    Answer dicts covering every category of every column, plus random combinations
+    and one row of unseen values.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    longest = max(len(vocab) for vocab in frozen.vocabularies)
+    for i in range(longest):
+        rows.append({col: vocab[i % len(vocab)] for col, vocab in zip(frozen.columns, frozen.vocabularies)})
+    for _ in range(n_random):
+        rows.append({col: rng.choice(vocab) for col, vocab in zip(frozen.columns, frozen.vocabularies)})
+    rows.append({col: UNKNOWN for col in frozen.columns})
+    return rows
+
+
+registry.register('frozen_encoder', 'cbe_encoder.pkl', lambda path: FrozenEncoder.freeze(load_pickle(path)))
+
+
+def get_frozen_encoder():
+    return registry.get('frozen_encoder')
+
+
+if __name__ == '__main__':
+    # Freeze cbe_encoder.pkl, check parity against encoder.transform and time both paths:
+    import time
+
+    import pandas as pd
+
+    from resources import get_encoder
+
+    encoder = get_encoder()
+    frozen = FrozenEncoder.freeze(encoder)
+    max_diff = check_parity(encoder, frozen, parity_answers(frozen))
+    print(f'Parity with encoder.transform: max abs diff {max_diff:.2e}')
+
+    answers = parity_answers(frozen, n_random=0)[0]
+    n = 1000
+    start = time.perf_counter()
+    for _ in range(n):
+        encoder.transform(pd.DataFrame([answers]))
+    pandas_us = (time.perf_counter() - start) / n * 1e6
+    start = time.perf_counter()
+    for _ in range(n):
+        frozen.encode_one(answers)
+    frozen_us = (time.perf_counter() - start) / n * 1e6
+    print(f'Single-row encoding: encoder.transform {pandas_us:.1f} us, frozen {frozen_us:.1f} us')
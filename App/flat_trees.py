@@ -0,0 +1,208 @@
+import numpy as np
+
+# Missing-value handling of a LightGBM split (`missing_type` in dump_model):
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+_MISSING_TYPES = {'None': MISSING_NONE, 'Zero': MISSING_ZERO, 'NaN': MISSING_NAN}
+_ZERO_THRESHOLD = 1e-35
+
+
+def _flatten_tree(node, features, arrays):
+    """
+    Append one dump_model() tree to the flat node arrays; return its root node id.
+    Split features are remapped to columns of the encoded matrix with `features`.
+    """
+    node_id = len(arrays['feature'])
+    arrays['feature'].append(-1)
+    arrays['threshold'].append(0.0)
+    arrays['left'].append(node_id)
+    arrays['right'].append(node_id)
+    arrays['default_left'].append(False)
+    arrays['missing_type'].append(MISSING_NONE)
+    arrays['value'].append(0.0)
+    if 'leaf_value' in node:
+        arrays['value'][node_id] = node['leaf_value']
+        return node_id
+    if node['decision_type'] != '<=':
+        raise ValueError(f"unsupported split type {node['decision_type']!r} (categorical splits are not exported)")
+    arrays['feature'][node_id] = int(features[node['split_feature']])
+    arrays['threshold'][node_id] = float(node['threshold'])
+    arrays['default_left'][node_id] = bool(node['default_left'])
+    arrays['missing_type'][node_id] = _MISSING_TYPES[node['missing_type']]
+    arrays['left'][node_id] = _flatten_tree(node['left_child'], features, arrays)
+    arrays['right'][node_id] = _flatten_tree(node['right_child'], features, arrays)
+    return node_id
+
+
+def _tree_depth(node):
+    if 'leaf_value' in node:
+        return 0
+    return 1 + max(_tree_depth(node['left_child']), _tree_depth(node['right_child']))
+
+
+class FlatEnsemble:
+    """
+    The EasyEnsemble(LightGBM) model as contiguous NumPy arrays.
+    All trees of all members share one set of node arrays (feature, threshold,
+    children, default direction, missing type, leaf value). `predict_proba`
+    walks every tree for every row at once, one tree level per step, so scoring
+    needs NumPy only: no lightgbm, imblearn or sklearn import. `source` holds the
+    sha256 of the pickles it was exported from (see resources.source_digests).
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'default_left', 'missing_type', 'value',
+              'tree_roots', 'member_starts', 'sigmoid')
+
+    def __init__(self, feature, threshold, left, right, default_left, missing_type, value,
+                 tree_roots, member_starts, sigmoid, max_depth, source=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        self.missing_type = np.ascontiguousarray(missing_type, dtype=np.int8)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.tree_roots = np.ascontiguousarray(tree_roots, dtype=np.int32)
+        self.member_starts = np.ascontiguousarray(member_starts, dtype=np.int64)
+        self.sigmoid = np.ascontiguousarray(sigmoid, dtype=np.float64)
+        self.max_depth = int(max_depth)
+        self.source = source
+
+    @property
+    def n_members(self):
+        return len(self.member_starts)
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        Flatten the fitted EasyEnsembleClassifier (best_model.pkl).
+        Trees come from each member's `booster_.dump_model()`; split features are
+        remapped through `estimators_features_` so the evaluator takes the encoded
+        matrix in encoder column order.
+        """
+        from explainers import ensemble_feature_indices, ensemble_members
+
+        arrays = {name: [] for name in ('feature', 'threshold', 'left', 'right', 'default_left', 'missing_type', 'value')}
+        tree_roots, member_starts, sigmoid = [], [], []
+        max_depth = 0
+        for member, features in zip(ensemble_members(model), ensemble_feature_indices(model)):
+            dump = member.booster_.dump_model()
+            objective = dump.get('objective', 'binary sigmoid:1').split()
+            if objective[0] != 'binary':
+                raise ValueError(f'unsupported objective {dump.get("objective")!r}')
+            coefficient = [float(part.split(':')[1]) for part in objective[1:] if part.startswith('sigmoid:')]
+            sigmoid.append(coefficient[0] if coefficient else 1.0)
+            member_starts.append(len(tree_roots))
+            for tree in dump['tree_info']:
+                tree_roots.append(_flatten_tree(tree['tree_structure'], features, arrays))
+                max_depth = max(max_depth, _tree_depth(tree['tree_structure']))
+        return cls(tree_roots=tree_roots, member_starts=member_starts, sigmoid=sigmoid, max_depth=max_depth, **arrays)
+
+    def raw_scores(self, X, max_cells=4_000_000):
+        """
+        Sum of leaf values per member.
+        Parameters:
+        X (np.ndarray): (n_rows, n_features) encoded matrix.
+        max_cells (int): Bound on rows x trees evaluated at once (memory cap).
+        Returns:
+        np.ndarray: (n_rows, n_members) raw (log-odds) scores.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        n_trees = len(self.tree_roots)
+        block = max(1, max_cells // max(n_trees, 1))
+        out = np.empty((X.shape[0], self.n_members))
+        for start in range(0, X.shape[0], block):
+            out[start:start + block] = self._raw_block(X[start:start + block])
+        return out
+
+    def _raw_block(self, X):
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.broadcast_to(self.tree_roots, (n_rows, len(self.tree_roots))).copy()
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            is_split = feature >= 0
+            if not is_split.any():
+                break
+            x = X[rows, np.maximum(feature, 0)]
+            missing_type = self.missing_type[nodes]
+            is_nan = np.isnan(x)
+            missing = ((missing_type == MISSING_NAN) & is_nan) | (
+                (missing_type == MISSING_ZERO) & (is_nan | (np.abs(x) <= _ZERO_THRESHOLD)))
+            # Like LightGBM, NaN is read as 0.0 when the split has no missing-value branch:
+            x = np.where(is_nan, 0.0, x)
+            go_left = np.where(missing, self.default_left[nodes], x <= self.threshold[nodes])
+            nodes = np.where(is_split, np.where(go_left, self.left[nodes], self.right[nodes]), nodes)
+        return np.add.reduceat(self.value[nodes], self.member_starts, axis=1)
+
+    def member_probabilities(self, X):
+        """
+        Class 1 probability of every member: (n_rows, n_members).
+        """
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * self.raw_scores(X)))
+
+    def predict_proba(self, X):
+        """
+        Ensemble probabilities like EasyEnsembleClassifier.predict_proba: the mean
+        of the member probabilities. Returns (n_rows, 2).
+        """
+        positive = self.member_probabilities(X).mean(axis=1)
+        return np.column_stack([1 - positive, positive])
+
+    def save(self, path):
+        source = {f'source_{key}': np.asarray(value) for key, value in (self.source or {}).items()}
+        np.savez(path, max_depth=self.max_depth, **source, **{name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            source = {name[len('source_'):]: str(data[name]) for name in data.files if name.startswith('source_')}
+            return cls(max_depth=int(data['max_depth']), source=source or None,
+                       **{name: data[name] for name in cls.ARRAYS})
+
+
+def check_parity(model, flat, X, atol=1e-9):
+    """
+    Compare the flat evaluator with `model.predict_proba` on the encoded rows `X`.
+    Returns:
+    float: Largest absolute probability difference; raises AssertionError above `atol`.
+    """
+    expected = model.predict_proba(X)[:, 1]
+    actual = flat.predict_proba(X)[:, 1]
+    max_diff = float(np.abs(expected - actual).max())
+    if max_diff > atol:
+        raise AssertionError(f'flat evaluator differs from predict_proba by {max_diff}')
+    return max_diff
+
+
+if __name__ == '__main__':
+    # Export best_model.pkl to flat_model.npz and the frozen cbe_encoder.pkl to
+    # frozen_encoder.npz (so HEART_BACKEND=flat scores with NumPy alone), check
+    # parity and time both paths:
+    import os
+    import time
+
+    from fast_encoder import get_frozen_encoder, parity_answers
+    from resources import artifact_path, get_model, source_digests
+
+    model = get_model()
+    flat = FlatEnsemble.from_model(model)
+    flat.source = source_digests()
+    path = artifact_path('flat_model.npz')
+    flat.save(path)
+    flat = FlatEnsemble.load(path)
+    print(f'Exported {len(flat.tree_roots)} trees / {len(flat.feature)} nodes of {flat.n_members} members '
+          f'to {path} ({os.path.getsize(path) / 1e6:.1f} MB)')
+
+    encoder = get_frozen_encoder()
+    encoder.source = flat.source
+    encoder.save(artifact_path('frozen_encoder.npz'))
+    print(f"Exported the encoder tables to {artifact_path('frozen_encoder.npz')}")
+    X = encoder.encode_records(parity_answers(encoder))
+    print(f'Parity with predict_proba: max abs diff {check_parity(model, flat, X):.2e}')
+
+    for n_rows in (1, 100, len(X)):
+        for label, predict in (('predict_proba', model.predict_proba), ('flat evaluator', flat.predict_proba)):
+            start = time.perf_counter()
+            for _ in range(20):
+                predict(X[:n_rows])
+            print(f'{n_rows:>5} rows  {label:<15} {(time.perf_counter() - start) / 20 * 1000:8.2f} ms')
@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import threading
+import time
+
+import numpy as np
+
+import metrics
+from schema import FEATURES
+
+
+def sample_profiles(n_profiles, seed=1981):
+    """
+    Draw answer profiles from the BRFSS reference data (rows sampled uniformly, so
+    common profiles come up as often as they do in the population).
+    Returns:
+    list: `n_profiles` answer dicts.
+    """
+    from reference_data import read_columns
+
+    df = read_columns(FEATURES)
+    rows = np.random.default_rng(seed).integers(0, len(df), size=n_profiles)
+    return df.iloc[rows][FEATURES].astype(str).to_dict('records')
+
+
+class PipelineSession:
+    """
+    One simulated user running the app's request path without Streamlit:
+    cached assessment, recommendations and the pie chart figure.
+    """
+
+    def __init__(self, state):
+        self.state = state
+
+    def request(self, answers):
+        from assessment_cache import cached_assess
+        from recommendations import build_recommendations
+
+        state = self.state
+        served = state.route(answers)
+        with metrics.time_stage('assessment'):
+            result = cached_assess(state.assessment_cache, answers, served.version, served.model, served.encoder,
+                                   served.explainer_pool, served.inference_pool)
+        with metrics.time_stage('recommendations'):
+            advice = build_recommendations(result.risk, answers, result.importances)
+        if result.risk > 25:
+            from pie_chart import pie_charts
+
+            with metrics.time_stage('chart'):
+                pie_charts.figure(advice.pie_labels, advice.pie_values)
+
+
+class AppTestSession:
+    """
+    One simulated user driving the full heart_app.py script with Streamlit's
+    AppTest: set the 22 selectboxes (keyed by feature name), click the button
+    and rerun the script.
+    """
+
+    def __init__(self, state, timeout=60):
+        from streamlit.testing.v1 import AppTest
+
+        self.timeout = timeout
+        self.app = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'heart_app.py'),
+                                     default_timeout=timeout)
+        self.app.run()
+
+    def request(self, answers):
+        for feature in FEATURES:
+            self.app.selectbox(key=feature).set_value(answers[feature])
+        self.app.button[0].click()
+        self.app.run()
+        if self.app.exception:
+            raise RuntimeError(self.app.exception[0].message)
+
+
+SESSIONS = {'pipeline': PipelineSession, 'apptest': AppTestSession}
+
+
+def percentiles(values):
+    values = np.asarray(values) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (None, None, None)
+    return {'count': len(values), 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+            'mean_ms': float(values.mean()) if len(values) else None}
+
+
+def run_load(session_class, state, profiles, concurrency, duration):
+    """
+    Run `concurrency` sessions back to back for `duration` seconds.
+    Every session walks its own slice of `profiles`. Stage latencies are collected
+    from the metrics histograms (see metrics.py), so they are the ones the app
+    itself reports.
+    Returns:
+    dict: Throughput, errors and p50/p95/p99 per stage ('request' = whole request).
+    """
+    samples = {'request': []}
+
+    def listener(value, labelvalues):
+        samples.setdefault(labelvalues[0], []).append(value)
+
+    sessions = [session_class(state) for _ in range(concurrency)]
+    errors = [0] * concurrency
+    metrics.stage_seconds.listeners.append(listener)
+    deadline = time.perf_counter() + duration
+
+    def run(i):
+        k = i
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                sessions[i].request(profiles[k % len(profiles)])
+                samples['request'].append(time.perf_counter() - start)
+            except Exception:
+                errors[i] += 1
+            k += concurrency
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(concurrency)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        metrics.stage_seconds.listeners.remove(listener)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'concurrency': concurrency,
+        'seconds': elapsed,
+        'requests': len(samples['request']),
+        'errors': sum(errors),
+        'throughput_rps': len(samples['request']) / elapsed,
+        'stages': {stage: percentiles(values) for stage, values in samples.items()},
+    }
+
+
+def cache_counts(before, after):
+    """
+    Lookups of one run by the tier that answered them ('computed' = cache miss),
+    from two AssessmentCache.stats() snapshots.
+    """
+    counts = {source: after[counter] - before[counter] for source, counter in
+              (('warm', 'warm_hits'), ('memory', 'hits'), ('disk', 'disk_hits'), ('computed', 'misses'))}
+    lookups = sum(counts.values())
+    counts['hit_rate'] = (lookups - counts['computed']) / lookups if lookups else 0.0
+    counts['evictions'] = after['evictions'] - before['evictions']
+    counts['entries'] = after['entries']
+    return counts
+
+
+def _vm_hwm_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb(worker_pids=()):
+    """
+    Peak resident memory of this process and of the inference workers, in MB.
+    The workers are still running, and getrusage(RUSAGE_CHILDREN) only covers
+    children that ended and were waited for, so their peaks are summed from
+    VmHWM in /proc/<pid>/status instead ('workers' is None without /proc).
+    """
+    scale = 1 / 1024 if platform.system() != 'Darwin' else 1 / 1024 ** 2
+    peaks = [_vm_hwm_kb(pid) for pid in worker_pids]
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        'workers': sum(peaks) / 1024 if None not in peaks else None,
+        'worker_count': len(peaks),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent-session load test of the heart disease app.')
+    parser.add_argument('--mode', choices=sorted(SESSIONS), default='pipeline',
+                        help="'pipeline': the app's request path; 'apptest': the full script via Streamlit AppTest.")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds per concurrency level.')
+    parser.add_argument('--profiles', type=int, default=10000, help='Answer profiles sampled from the BRFSS data.')
+    parser.add_argument('--seed', type=int, default=1981)
+    parser.add_argument('--cache', choices=['cold', 'shared'], default='cold',
+                        help="'cold': empty the memory tier before every concurrency level; "
+                             "'shared': carry it over, so later levels mostly measure cache hits.")
+    parser.add_argument('--output', default='load_test.json', help='JSON report, to compare runs across releases.')
+    args = parser.parse_args()
+
+    from startup import load_serving_state
+
+    state = load_serving_state()
+    profiles = sample_profiles(args.profiles, args.seed)
+    report = {
+        'mode': args.mode,
+        'model_version': state.version,
+        'backend': os.environ.get('HEART_BACKEND', 'pickle'),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'cpu_count': os.cpu_count(),
+        'startup_seconds': state.timings,
+        'cache_mode': args.cache,
+        'runs': [],
+    }
+    cache = state.assessment_cache
+    worker_pids = state.inference_pool.worker_pids if state.inference_pool is not None else tuple
+    for concurrency in args.concurrency:
+        if args.cache == 'cold':
+            cache.clear()
+        before = cache.stats()
+        run = run_load(SESSIONS[args.mode], state, profiles, concurrency, args.duration)
+        run['cache'] = cache_counts(before, cache.stats())
+        run['peak_rss_mb'] = peak_rss_mb(worker_pids())
+        report['runs'].append(run)
+        request = run['stages']['request']
+        print(f"{concurrency:>3} sessions: {run['throughput_rps']:8.1f} req/s  "
+              f"p50 {request['p50_ms'] or 0:7.1f} ms  p95 {request['p95_ms'] or 0:7.1f} ms  "
+              f"p99 {request['p99_ms'] or 0:7.1f} ms  errors {run['errors']}")
+        counts = run['cache']
+        print(f"      cache            warm {counts['warm']}  memory {counts['memory']}  disk {counts['disk']}  "
+              f"computed {counts['computed']}  (hit rate {counts['hit_rate']:.1%})")
+        for stage, stats in run['stages'].items():
+            if stage != 'request' and stats['count']:
+                print(f"      {stage:<16} p50 {stats['p50_ms']:7.2f} ms  p95 {stats['p95_ms']:7.2f} ms  "
+                      f"p99 {stats['p99_ms']:7.2f} ms  ({stats['count']} samples)")
+    report['peak_rss_mb'] = peak_rss = peak_rss_mb(worker_pids())
+    workers = 'n/a' if peak_rss['workers'] is None else f"{peak_rss['workers']:.0f} MB"
+    print(f"Peak RSS: {peak_rss['self']:.0f} MB (workers: {workers} over {peak_rss['worker_count']} processes)")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, default=float)
+    print(f'Report written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
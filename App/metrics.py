@@ -0,0 +1,220 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram buckets for stage latencies, in seconds (1 ms .. 10 s):
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _label_text(labelnames, labelvalues):
+    if not labelnames:
+        return ''
+    pairs = []
+    for name, value in zip(labelnames, labelvalues):
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+    """
+    Monotonic counter, optionally split by labels.
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self.labelnames, labels, value) for labels, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down (set explicitly).
+    """
+
+    kind = 'gauge'
+
+    def set(self, *labelvalues, value):
+        with self._lock:
+            self._values[labelvalues] = float(value)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of observed values, optionally split by labels.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        # Callables (value, labelvalues) receiving every raw observation (e.g. load_test.py):
+        self.listeners = []
+
+    def observe(self, value, *labelvalues):
+        for listener in self.listeners:
+            listener(value, labelvalues)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def samples(self):
+        out = []
+        bucket_labelnames = self.labelnames + ('le',)
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series['counts']):
+                    out.append((f'{self.name}_bucket', bucket_labelnames, labels + (repr(float(bound)),), count))
+                out.append((f'{self.name}_bucket', bucket_labelnames, labels + ('+Inf',), series['count']))
+                out.append((f'{self.name}_sum', self.labelnames, labels, series['sum']))
+                out.append((f'{self.name}_count', self.labelnames, labels, series['count']))
+        return out
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics, rendered in the Prometheus text exposition format.
+    Dependency-free on purpose: the app only needs counters, a gauge and latency
+    histograms, and they must be cheap enough to update on every request.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labelnames, labelvalues, value in metric.samples():
+                lines.append(f'{name}{_label_text(labelnames, labelvalues)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """
+        Write the metrics to `path` atomically (node_exporter textfile collector format).
+        """
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+registry = MetricsRegistry()
+stage_seconds = registry.register(Histogram(
+    'heart_stage_seconds', 'Wall time of each assessment stage.', ['stage']))
+assessments_total = registry.register(Counter(
+    'heart_assessments_total', 'Assessments served, by where the result came from.', ['source']))
+errors_total = registry.register(Counter(
+    'heart_errors_total', 'Assessments that failed, by entry point.', ['entry_point']))
+model_info = registry.register(Gauge(
+    'heart_model_info', 'Model version currently served (always 1).', ['model_version', 'backend']))
+
+
+@contextmanager
+def time_stage(stage):
+    """
+    Observe the wall time of the enclosed block under `stage`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage)
+
+
+def record_result(result, observe_stages=True):
+    """
+    Count one PredictionResult by source and, when it was computed here (not read
+    from a cache), observe its pipeline stage timings.
+    """
+    assessments_total.inc(result.source)
+    if observe_stages:
+        for stage, seconds in result.timings.items():
+            stage_seconds.observe(seconds, stage)
+
+
+def set_model(model_version, backend=None):
+    """
+    Advertise the served model version (and backend, default HEART_BACKEND) in heart_model_info.
+    """
+    model_info.clear()
+    model_info.set(model_version, backend or os.environ.get('HEART_BACKEND', 'pickle'), value=1)
+
+
+def export():
+    """
+    Write the metrics file configured with HEART_METRICS_FILE, if any.
+    """
+    path = os.environ.get('HEART_METRICS_FILE')
+    if path:
+        registry.write_textfile(path)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port=None, host='127.0.0.1'):
+    """
+    Serve GET /metrics from a daemon thread, once per process. The Streamlit app
+    cannot add routes to its own server, so it exposes metrics on a side port
+    (HEART_METRICS_PORT). Returns the server, or None when no port is configured.
+    """
+    global _server
+    port = port or int(os.environ.get('HEART_METRICS_PORT', 0))
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    found = self.path == '/metrics'
+                    body = registry.render().encode() if found else b'not found\n'
+                    self.send_response(200 if found else 404)
+                    self.send_header('Content-Type', CONTENT_TYPE)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+    return _server
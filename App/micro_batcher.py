@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row requests into batches.
+    Callers `submit` one item and get a Future back. A background thread takes
+    the first waiting item, keeps collecting until `max_batch` items are queued
+    or `max_wait` seconds have passed since that first item, then runs
+    `run_batch` once for the whole batch and fans the results back out.
+    Parameters:
+    run_batch (callable): Takes a list of items and returns a list of results in the same order.
+    max_batch (int): Largest batch handed to `run_batch`.
+    max_wait (float): Longest time (seconds) the first item of a batch waits for company.
+    """
+
+    def __init__(self, run_batch, max_batch=32, max_wait=0.005, history=10000):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._batch_sizes = Counter()
+        self._queue_delays = deque(maxlen=history)
+        self._run_seconds = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._loop, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """
+        Queue one item for the next batch.
+        Returns:
+        concurrent.futures.Future: Resolves to the item's result (or its batch's exception).
+        """
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                results = self.run_batch([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    # A short result list would leave some callers waiting forever
+                    raise ValueError(f'run_batch returned {len(results)} results for {len(batch)} items')
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self._batch_sizes[len(batch)] += 1
+                self._queue_delays.extend(started - enqueued for _, _, enqueued in batch)
+                self._run_seconds.append(finished - started)
+
+    def stats(self):
+        """
+        Return batch size and queueing delay metrics (delays in milliseconds, over
+        the most recent requests).
+        """
+        with self._lock:
+            delays = np.asarray(self._queue_delays) * 1000
+            run_ms = np.asarray(self._run_seconds) * 1000
+            batch_sizes = dict(sorted(self._batch_sizes.items()))
+            batches, items, errors = self.batches, self.items, self.errors
+        percentile = lambda values, q: round(float(np.percentile(values, q)), 3) if len(values) else None
+        return {
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+            'queued': self._queue.qsize(),
+            'batches': batches,
+            'items': items,
+            'errors': errors,
+            'mean_batch_size': round(items / batches, 2) if batches else None,
+            'batch_sizes': batch_sizes,
+            'queue_delay_ms': {'p50': percentile(delays, 50), 'p99': percentile(delays, 99)},
+            'batch_run_ms': {'p50': percentile(run_ms, 50), 'p99': percentile(run_ms, 99)},
+        }
@@ -0,0 +1,264 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from resources import check_source, file_digest, registry
+from schema import FEATURES
+
+BUNDLE_FORMAT = 'heart-model-bundle'
+BUNDLE_VERSION = 1
+MANIFEST = 'manifest.json'
+DEFAULT_BUNDLE = 'model_bundle'
+# Training data hash and test metrics written by Modeling.py next to the pickles:
+MODEL_METADATA = 'model_metadata.json'
+ENCODER_TABLES = 'encoder_tables.npy'
+ENCODER_OFFSETS = 'encoder_offsets.npy'
+
+
+class BundleMember:
+    """
+    One ensemble member loaded from its native LightGBM model file.
+    Exposes the attributes the serving code reads from an LGBMClassifier
+    (`booster_`, `n_features_`, `predict_proba`) without sklearn.
+    """
+
+    def __init__(self, booster):
+        self.booster_ = booster
+        self.n_features_ = booster.num_feature()
+
+    def predict_proba(self, X):
+        positive = self.booster_.predict(X)
+        return np.column_stack([1 - positive, positive])
+
+
+class BundleEnsemble:
+    """
+    The EasyEnsemble as loaded from a bundle: the member boosters and the columns
+    each one was fitted on. `predict_proba` matches
+    EasyEnsembleClassifier.predict_proba (mean of the member probabilities), and
+    `estimators_` / `estimators_features_` let explainers.py, thread_budget.py
+    and flat_trees.py treat it like the pickled model. compaction.py builds the
+    same object straight from the pickled ensemble.
+    """
+
+    def __init__(self, members, estimators_features, manifest):
+        self.estimators_ = list(members)
+        self.estimators_features_ = [np.asarray(features) for features in estimators_features]
+        self.manifest = manifest
+
+    @property
+    def members(self):
+        return self.estimators_
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        positive = np.zeros(X.shape[0])
+        for member, features in zip(self.estimators_, self.estimators_features_):
+            positive += member.booster_.predict(X[:, features])
+        positive /= len(self.estimators_)
+        return np.column_stack([1 - positive, positive])
+
+
+def _library_versions():
+    import lightgbm
+
+    return {'lightgbm': lightgbm.__version__, 'numpy': np.__version__}
+
+
+def write_bundle(path, model, encoder, training_data_sha256=None, metrics=None, source=None):
+    """
+    Write a versioned model bundle directory.
+    Layout: `member_<i>.txt` (each member's native LightGBM model text),
+    `encoder_tables.npy` / `encoder_offsets.npy` (every column's encoded values
+    back to back, unknown slot last) and `manifest.json` (format version, feature
+    order, vocabularies, member columns, training data hash, metrics, library
+    versions, the pickles it was converted from and the sha256 of every file).
+    The directory is written next to
+    `path` and renamed into place, so readers never see half a bundle.
+    Parameters:
+    path (str): Bundle directory to create or replace.
+    model: The fitted EasyEnsembleClassifier.
+    encoder: The fitted CatBoostEncoder, or a FrozenEncoder.
+    training_data_sha256 (str, optional): Hash of the training data file.
+    metrics (dict, optional): Evaluation metrics to record (e.g. {'roc_auc': 0.84}).
+    source (dict, optional): sha256 of the pickles converted (resources.source_digests);
+        a bundle whose source differs from the deployed pickles is refused.
+    Returns:
+    dict: The manifest.
+    """
+    from explainers import ensemble_feature_indices, ensemble_members
+    from fast_encoder import FrozenEncoder
+
+    frozen = encoder if isinstance(encoder, FrozenEncoder) else FrozenEncoder.freeze(encoder)
+    if frozen.columns != FEATURES:
+        raise ValueError('encoder columns differ from schema.FEATURES')
+
+    path = os.path.abspath(path)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    members = []
+    for i, (member, features) in enumerate(zip(ensemble_members(model), ensemble_feature_indices(model))):
+        file_name = f'member_{i}.txt'
+        member.booster_.save_model(os.path.join(tmp_path, file_name))
+        members.append({'file': file_name, 'features': [int(j) for j in features]})
+
+    offsets = np.cumsum([0] + [len(table) for table in frozen.tables]).astype(np.int64)
+    np.save(os.path.join(tmp_path, ENCODER_TABLES), np.concatenate(frozen.tables).astype(np.float64))
+    np.save(os.path.join(tmp_path, ENCODER_OFFSETS), offsets)
+
+    file_names = [member['file'] for member in members] + [ENCODER_TABLES, ENCODER_OFFSETS]
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'format_version': BUNDLE_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'features': FEATURES,
+        'vocabularies': {column: vocab.tolist() for column, vocab in zip(frozen.columns, frozen.vocabularies)},
+        'members': members,
+        'training_data_sha256': training_data_sha256,
+        'metrics': metrics or {},
+        'source': source,
+        'libraries': _library_versions(),
+        'files': {name: file_digest(os.path.join(tmp_path, name)) for name in file_names},
+    }
+    with open(os.path.join(tmp_path, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = f'{path}.{os.getpid()}.old'
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return manifest
+
+
+def read_manifest(path):
+    """
+    Read and check the manifest of the bundle directory `path`.
+    Raises ValueError for a missing manifest, another format, a newer format
+    version, missing entries or a feature order that differs from schema.FEATURES.
+    """
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f'{path} has no {MANIFEST}') from None
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f'{path} is not a {BUNDLE_FORMAT} directory')
+    if manifest.get('format_version', 0) > BUNDLE_VERSION:
+        raise ValueError(f"bundle format version {manifest['format_version']} is newer than this app ({BUNDLE_VERSION})")
+    missing = [key for key in ('features', 'vocabularies', 'members', 'files') if key not in manifest]
+    if missing:
+        raise ValueError(f"{MANIFEST} in {path} has no {', '.join(missing)} entry")
+    if manifest['features'] != FEATURES:
+        raise ValueError('bundle feature order differs from schema.FEATURES')
+    return manifest
+
+
+def verify_bundle(path, manifest):
+    """
+    Check every bundle file against the sha256 recorded in the manifest.
+    A file the loader reads without a recorded sha256 is refused as well.
+    """
+    needed = [member['file'] for member in manifest['members']] + [ENCODER_TABLES, ENCODER_OFFSETS]
+    unhashed = [name for name in needed if name not in manifest['files']]
+    if unhashed:
+        raise ValueError(f"{MANIFEST} in {path} records no sha256 for {', '.join(unhashed)}")
+    for name, expected in manifest['files'].items():
+        actual = file_digest(os.path.join(path, name))
+        if actual != expected:
+            raise ValueError(f'{name} in {path} is corrupted (sha256 {actual[:12]}, manifest {expected[:12]})')
+
+
+def load_bundle(path=DEFAULT_BUNDLE, verify=True):
+    """
+    Load a bundle written by `write_bundle`.
+    The encoder tables are memory-mapped; members are parsed from their native
+    model text by LightGBM (no sklearn/imblearn unpickling). A bundle that was
+    not converted from the pickles deployed next to it is refused.
+    Parameters:
+    path (str): Bundle directory, relative to the app folder.
+    verify (bool): Check the file hashes against the manifest first.
+    Returns:
+    tuple: (BundleEnsemble, FrozenEncoder, manifest dict)
+    """
+    import lightgbm as lgb
+
+    from fast_encoder import FrozenEncoder
+    from resources import artifact_path
+
+    path = artifact_path(path)
+    manifest = read_manifest(path)
+    check_source(manifest.get('source'), path)
+    if verify:
+        verify_bundle(path, manifest)
+
+    # The objective is passed along so SHAP reads the boosters as binary classifiers:
+    members = [BundleMember(lgb.Booster(params={'objective': 'binary'}, model_file=os.path.join(path, member['file'])))
+               for member in manifest['members']]
+    model = BundleEnsemble(members, [member['features'] for member in manifest['members']], manifest)
+
+    tables = np.load(os.path.join(path, ENCODER_TABLES), mmap_mode='r')
+    offsets = np.load(os.path.join(path, ENCODER_OFFSETS))
+    encoder = FrozenEncoder(
+        manifest['features'],
+        [manifest['vocabularies'][column] for column in manifest['features']],
+        [tables[offsets[j]:offsets[j + 1]] for j in range(len(manifest['features']))],
+        source=manifest.get('source'),
+    )
+    return model, encoder, manifest
+
+
+# The bundle is tracked through its manifest: rewriting the bundle rewrites the
+# manifest (new file hashes), which reloads it.
+registry.register('model_bundle', os.path.join(DEFAULT_BUNDLE, MANIFEST), lambda path: load_bundle(os.path.dirname(path)))
+
+
+def get_bundle():
+    return registry.get('model_bundle')
+
+
+if __name__ == '__main__':
+    # Convert best_model.pkl + cbe_encoder.pkl into a bundle (with the training data
+    # hash and metrics of model_metadata.json, if Modeling.py wrote one), check
+    # parity and compare size and load time with unpickling:
+    import subprocess
+    import sys
+
+    from fast_encoder import get_frozen_encoder, parity_answers
+    from resources import artifact_path, get_encoder, get_model, source_digests
+
+    metadata = {}
+    if os.path.exists(artifact_path(MODEL_METADATA)):
+        with open(artifact_path(MODEL_METADATA)) as f:
+            metadata = json.load(f)
+    bundle_path = artifact_path(DEFAULT_BUNDLE)
+    manifest = write_bundle(bundle_path, get_model(), get_encoder(), metadata.get('training_data_sha256'),
+                            metadata.get('metrics'), source=source_digests())
+    model, encoder, _ = load_bundle(bundle_path)
+
+    answers_list = parity_answers(encoder)
+    X = get_frozen_encoder().encode_records(answers_list)
+    assert np.array_equal(X, encoder.encode_records(answers_list)), 'bundle encoder differs from cbe_encoder.pkl'
+    max_diff = float(np.abs(get_model().predict_proba(X)[:, 1] - model.predict_proba(X)[:, 1]).max())
+    print(f'Parity with best_model.pkl: max abs diff {max_diff:.2e}')
+
+    pickled_bytes = os.path.getsize(artifact_path('best_model.pkl')) + os.path.getsize(artifact_path('cbe_encoder.pkl'))
+    bundle_bytes = sum(os.path.getsize(os.path.join(bundle_path, name)) for name in list(manifest['files']) + [MANIFEST])
+    print(f'Size: pickles {pickled_bytes / 1e6:.2f} MB, bundle {bundle_bytes / 1e6:.2f} MB')
+
+    # Cold loads in fresh interpreters, imports included:
+    loads = {
+        'pickles': 'from resources import artifact_path, load_pickle; '
+                   "load_pickle(artifact_path('best_model.pkl')); load_pickle(artifact_path('cbe_encoder.pkl'))",
+        'bundle': 'from model_bundle import load_bundle; load_bundle()',
+    }
+    for label, code in loads.items():
+        timed = f'import time; start = time.perf_counter(); {code}; print(time.perf_counter() - start)'
+        seconds = float(subprocess.run([sys.executable, '-c', timed], cwd=os.path.dirname(bundle_path),
+                                       capture_output=True, text=True, check=True).stdout)
+        print(f'Cold load: {label:<8} {seconds * 1000:8.1f} ms')
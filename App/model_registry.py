@@ -0,0 +1,289 @@
+import os
+import threading
+import time
+import zlib
+
+import metrics
+from assessment_cache import answers_key
+from resources import artifact_path, file_digest, load_model, load_pickle
+from warm_profiles import WARM_TABLE
+
+MODEL_FILE = 'best_model.pkl'
+ENCODER_FILE = 'cbe_encoder.pkl'
+
+
+class ServedModel:
+    """
+    One loaded model version and everything needed to assess with it.
+    Attributes:
+    name (str): Version name (its directory name in the watched folder).
+    version (str): Model and encoder sha256 prefixes, like resources.model_version().
+    model: The scoring model.
+    encoder (FrozenEncoder): Compiled encoder; shared between versions with the same encoder file.
+    explainer_pool (ExplainerPool): Warmed per-member explainers of this model.
+    inference_pool (InferencePool or None): Worker processes serving this version, if any.
+    warm_table (str or None): Precomputed profiles of this version (warm_profiles.py), if any.
+    """
+
+    def __init__(self, name, version, model, encoder, explainer_pool, inference_pool=None, warm_table=None):
+        self.name = name
+        self.version = version
+        self.model = model
+        self.encoder = encoder
+        self.explainer_pool = explainer_pool
+        self.inference_pool = inference_pool
+        self.warm_table = warm_table
+        self.loaded_at = time.time()
+        self.requests = 0
+        self.risk_total = 0.0
+        self.bands = {}
+
+
+class ModelRegistry:
+    """
+    Several model versions served side by side from a watched directory.
+    Every subfolder of `directory` holding best_model.pkl and cbe_encoder.pkl is
+    a version, optionally with its own warm_profiles.feather; write new versions
+    to a temporary folder and rename it in. A
+    version is fully loaded (model, encoder, warmed explainers) before it can
+    serve, and the default is swapped by replacing one reference, so requests
+    never wait for a load and never see a half-loaded model. Versions whose
+    encoder file has the same sha256 share one FrozenEncoder. Versions evicted
+    beyond `keep` are not reloaded until their files change or the default's
+    folder is removed.
+    Parameters:
+    directory (str): Watched folder, relative to the app folder.
+    default (str, optional): Pinned default version; otherwise the newest folder
+        (by name) that is not the candidate.
+    candidate (str, optional): Version receiving `candidate_fraction` of the traffic.
+    candidate_fraction (float): Share of answer profiles routed to the candidate.
+    keep (int): Versions kept in memory besides the default and the candidate.
+    """
+
+    def __init__(self, directory='models', default=None, candidate=None, candidate_fraction=0.0, keep=1):
+        self.directory = artifact_path(directory)
+        self.pinned_default = default
+        self.candidate_name = candidate
+        self.candidate_fraction = candidate_fraction
+        self.keep = keep
+        self._versions = {}
+        self._digests = {}
+        self._signatures = {}
+        # Evicted versions still on disk: name -> (signature, digests)
+        self._evicted = {}
+        self._encoders = {}
+        self._default = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._watcher = None
+        self.swaps = 0
+        self.load_errors = {}
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build the registry from HEART_MODEL_DIR, HEART_DEFAULT_VERSION,
+        HEART_CANDIDATE_VERSION and HEART_CANDIDATE_FRACTION.
+        """
+        return cls(
+            directory=os.environ['HEART_MODEL_DIR'],
+            default=os.environ.get('HEART_DEFAULT_VERSION') or None,
+            candidate=os.environ.get('HEART_CANDIDATE_VERSION') or None,
+            candidate_fraction=float(os.environ.get('HEART_CANDIDATE_FRACTION', 0)),
+        )
+
+    def _scan(self):
+        versions = {}
+        for name in sorted(os.listdir(self.directory)):
+            folder = os.path.join(self.directory, name)
+            if name.startswith('.') or name.endswith('.tmp') or not os.path.isdir(folder):
+                continue
+            if os.path.exists(os.path.join(folder, MODEL_FILE)) and os.path.exists(os.path.join(folder, ENCODER_FILE)):
+                versions[name] = folder
+        return versions
+
+    def _load(self, name, folder, model_digest, encoder_digest):
+        from explainers import ExplainerPool
+        from fast_encoder import FrozenEncoder
+
+        model = load_model(os.path.join(folder, MODEL_FILE))
+        encoder = self._encoders.get(encoder_digest)
+        if encoder is None:
+            encoder = FrozenEncoder.freeze(load_pickle(os.path.join(folder, ENCODER_FILE)))
+            self._encoders[encoder_digest] = encoder
+        version = f'{model_digest[:12]}-{encoder_digest[:12]}'
+        explainer_pool = ExplainerPool(model, model_version=model_digest).warm()
+        return ServedModel(name, version, model, encoder, explainer_pool, warm_table=os.path.join(folder, WARM_TABLE))
+
+    def refresh(self):
+        """
+        Load new or changed versions, drop removed ones and swap the default when
+        it changes. Loading happens before the swap and outside the routing lock.
+        Returns:
+        list: Names of the versions loaded by this call.
+        """
+        with self._refresh_lock:
+            found = self._scan()
+            loaded = []
+            for name, folder in found.items():
+                paths = (os.path.join(folder, MODEL_FILE), os.path.join(folder, ENCODER_FILE))
+                # Only hash files whose mtime/size changed since the last refresh:
+                signature = tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, paths))
+                evicted_signature, evicted_digests = self._evicted.get(name, (None, None))
+                if signature in (self._signatures.get(name), evicted_signature):
+                    continue
+                digests = tuple(file_digest(path) for path in paths)
+                if digests == evicted_digests:
+                    self._evicted[name] = (signature, digests)
+                    continue
+                if self._digests.get(name) == digests:
+                    self._signatures[name] = signature
+                    continue
+                try:
+                    served = self._load(name, folder, *digests)
+                except Exception as e:
+                    # Probably still being written; retried on the next refresh
+                    self.load_errors[name] = str(e)
+                    continue
+                self.load_errors.pop(name, None)
+                self._evicted.pop(name, None)
+                with self._lock:
+                    self._versions[name] = served
+                    self._digests[name] = digests
+                    self._signatures[name] = signature
+                loaded.append(name)
+
+            swapped = None
+            with self._lock:
+                self._evicted = {name: evicted for name, evicted in self._evicted.items() if name in found}
+                for name in [name for name in self._versions if name not in found]:
+                    if self._default is not None and name == self._default.name:
+                        # The next default may be an evicted version: reconsider them
+                        self._evicted.clear()
+                    self._forget(name)
+                default = self._choose_default()
+                if default is not None and default is not self._default:
+                    self._default = default
+                    self.swaps += 1
+                    swapped = default
+                self._evict()
+                used = {served.encoder for served in self._versions.values()}
+                self._encoders = {digest: encoder for digest, encoder in self._encoders.items() if encoder in used}
+            if swapped is not None:
+                # heart_model_info advertises the registry's default (pickled) version:
+                metrics.set_model(swapped.version, backend='pickle')
+            return loaded
+
+    def _choose_default(self):
+        if self.pinned_default in self._versions:
+            return self._versions[self.pinned_default]
+        names = [name for name in sorted(self._versions) if name != self.candidate_name]
+        return self._versions[names[-1]] if names else self._default
+
+    def _evict(self):
+        protected = {self._default.name if self._default else None, self.candidate_name, self.pinned_default}
+        others = [name for name in sorted(self._versions) if name not in protected]
+        for name in others[:max(0, len(others) - self.keep)]:
+            self._evicted[name] = (self._signatures.get(name), self._digests[name])
+            self._forget(name)
+
+    def _forget(self, name):
+        del self._versions[name]
+        del self._digests[name]
+        self._signatures.pop(name, None)
+
+    def watch(self, poll_seconds=30.0):
+        """
+        Refresh in a daemon thread every `poll_seconds`, once per registry.
+        """
+        if self._watcher is None:
+            def poll():
+                while True:
+                    time.sleep(poll_seconds)
+                    try:
+                        self.refresh()
+                    except OSError as e:
+                        # The watched folder may be briefly unavailable (remount, redeploy)
+                        self.load_errors[self.directory] = str(e)
+
+            self._watcher = threading.Thread(target=poll, name='model-registry-watcher', daemon=True)
+            self._watcher.start()
+        return self
+
+    @property
+    def default(self):
+        return self._default
+
+    @property
+    def candidate(self):
+        return self._versions.get(self.candidate_name) if self.candidate_name else None
+
+    def route(self, answers):
+        """
+        Pick the version serving these answers. The candidate gets
+        `candidate_fraction` of the answer profiles; the split hashes the answers,
+        so a given profile always lands on the same version.
+        """
+        candidate = self.candidate
+        if candidate is not None and self.candidate_fraction > 0:
+            bucket = zlib.crc32('\x1f'.join(answers_key(answers)).encode()) / 2 ** 32
+            if bucket < self.candidate_fraction:
+                return candidate
+        if self._default is None:
+            raise RuntimeError(f'no model version found in {self.directory}')
+        return self._default
+
+    def record(self, served, result):
+        """
+        Count one assessment of `served`, for comparing the candidate with the default.
+        """
+        from recommendations import risk_band
+
+        band = risk_band(result.risk)
+        with self._lock:
+            served.requests += 1
+            served.risk_total += result.risk
+            served.bands[band] = served.bands.get(band, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'default': self._default.name if self._default else None,
+                'candidate': self.candidate_name,
+                'candidate_fraction': self.candidate_fraction,
+                'swaps': self.swaps,
+                'shared_encoders': len(self._encoders),
+                'load_errors': dict(self.load_errors),
+                'versions': {
+                    name: {
+                        'version': served.version,
+                        'loaded_at': served.loaded_at,
+                        'requests': served.requests,
+                        'mean_risk': served.risk_total / served.requests if served.requests else None,
+                        'bands': dict(served.bands),
+                    }
+                    for name, served in self._versions.items()
+                },
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """
+    Return the process-wide model registry, or None when HEART_MODEL_DIR is not set.
+    The first call loads every version and starts the watcher
+    (HEART_MODEL_POLL_SECONDS, default 30).
+    """
+    global _registry
+    if 'HEART_MODEL_DIR' not in os.environ:
+        return None
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = ModelRegistry.from_env()
+                registry.refresh()
+                _registry = registry.watch(float(os.environ.get('HEART_MODEL_POLL_SECONDS', 30)))
+    return _registry
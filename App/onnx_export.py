@@ -0,0 +1,194 @@
+import numpy as np
+
+from schema import FEATURES
+
+ONNX_OPSET = 15
+ONNX_ML_OPSET = 3
+INPUT_NAME = 'answers'
+OUTPUT_NAME = 'probabilities'
+
+
+def _encoder_nodes(frozen, input_name, output_name):
+    """
+    ONNX nodes replacing the frozen CatBoost encoder: for every column, a Gather
+    of the string answers and an ai.onnx.ml LabelEncoder (category -> encoded
+    value, unknown answers -> the encoder's unknown value), then one Concat.
+    """
+    from onnx import helper, numpy_helper
+
+    nodes, initializers, encoded = [], [], []
+    for j, (column, vocab, table) in enumerate(zip(frozen.columns, frozen.vocabularies, frozen.tables)):
+        index_name = f'enc_index_{j}'
+        initializers.append(numpy_helper.from_array(np.array([j], dtype=np.int64), index_name))
+        nodes.append(helper.make_node('Gather', [input_name, index_name], [f'enc_raw_{j}'], axis=1))
+        nodes.append(helper.make_node(
+            'LabelEncoder', [f'enc_raw_{j}'], [f'enc_value_{j}'], domain='ai.onnx.ml', name=f'encode_{column}',
+            keys_strings=vocab.tolist(), values_floats=table[:-1].astype(np.float32).tolist(),
+            default_float=float(table[-1]),
+        ))
+        encoded.append(f'enc_value_{j}')
+    nodes.append(helper.make_node('Concat', encoded, [output_name], axis=1))
+    return nodes, initializers
+
+
+def _member_graph(member, n_columns, prefix):
+    """
+    Convert one LGBMClassifier with onnxmltools and prefix every name in its graph,
+    so the members can live side by side in the ensemble graph.
+    Returns:
+    onnx.GraphProto: Inputs (n_rows, n_columns) floats; output `<prefix>probabilities`.
+    """
+    import onnx.compose
+    import onnxmltools
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    member_model = onnxmltools.convert_lightgbm(
+        member, initial_types=[('input', FloatTensorType([None, n_columns]))],
+        target_opset=ONNX_OPSET, zipmap=False,
+    )
+    return onnx.compose.add_prefix(member_model, prefix).graph
+
+
+def export_onnx(model, frozen, source=None):
+    """
+    Build one ONNX graph computing encoder + ensemble from the raw answers.
+    The graph takes a (n_rows, 22) string tensor of answers in FEATURES order,
+    encodes it with LabelEncoder lookups, feeds every EasyEnsemble member its own
+    columns (Gather with `estimators_features_`) and averages the member
+    probabilities like EasyEnsembleClassifier.predict_proba.
+    Parameters:
+    model: The fitted EasyEnsembleClassifier (best_model.pkl).
+    frozen (FrozenEncoder): The compiled encoder (see fast_encoder.py).
+    source (dict, optional): sha256 of the pickles exported (resources.source_digests),
+        stored as metadata so a stale export is refused at load time.
+    Returns:
+    onnx.ModelProto
+    """
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    from explainers import ensemble_feature_indices, ensemble_members
+
+    if list(frozen.columns) != FEATURES:
+        raise ValueError('encoder columns differ from schema.FEATURES')
+
+    nodes, initializers = _encoder_nodes(frozen, INPUT_NAME, 'encoded')
+    member_outputs = []
+    members = ensemble_members(model)
+    for i, (member, features) in enumerate(zip(members, ensemble_feature_indices(model))):
+        prefix = f'm{i}_'
+        graph = _member_graph(member, len(features), prefix)
+        initializers.append(numpy_helper.from_array(np.asarray(features, dtype=np.int64), f'{prefix}features'))
+        nodes.append(helper.make_node('Gather', ['encoded', f'{prefix}features'], [graph.input[0].name], axis=1))
+        nodes.extend(graph.node)
+        initializers.extend(graph.initializer)
+        member_outputs.append(next(output.name for output in graph.output if output.name.endswith('probabilities')))
+
+    initializers.append(numpy_helper.from_array(np.array(1.0 / len(members), dtype=np.float32), 'inverse_n_members'))
+    nodes.append(helper.make_node('Sum', member_outputs, ['probability_sum']))
+    nodes.append(helper.make_node('Mul', ['probability_sum', 'inverse_n_members'], [OUTPUT_NAME]))
+
+    graph = helper.make_graph(
+        nodes, 'heart_disease_ensemble',
+        [helper.make_tensor_value_info(INPUT_NAME, TensorProto.STRING, [None, len(FEATURES)])],
+        [helper.make_tensor_value_info(OUTPUT_NAME, TensorProto.FLOAT, [None, 2])],
+        initializers,
+    )
+    onnx_model = helper.make_model(graph, opset_imports=[
+        helper.make_opsetid('', ONNX_OPSET), helper.make_opsetid('ai.onnx.ml', ONNX_ML_OPSET),
+    ], producer_name='heart_disease_app')
+    helper.set_model_props(onnx_model, {f'source_{key}': value for key, value in (source or {}).items()})
+    onnx.checker.check_model(onnx_model)
+    return onnx_model
+
+
+def answers_matrix(answers):
+    """
+    Stack answers into the (n_rows, 22) string tensor the ONNX graph takes.
+    Parameters:
+    answers (list or dict): Answer dicts, or feature -> array of answers.
+    """
+    if isinstance(answers, dict):
+        return np.column_stack([np.asarray(answers[feature], dtype=str) for feature in FEATURES]).astype(object)
+    return np.array([[row.get(feature, '') for feature in FEATURES] for row in answers], dtype=object)
+
+
+class OnnxBackend:
+    """
+    Scoring backend running the exported graph with onnxruntime (CPU).
+    The graph includes the encoder, so it scores raw answers
+    (`predict_proba_answers`); `predict_positive` in backends.py dispatches to it.
+    Parameters:
+    path (str): The .onnx file written by `python onnx_export.py`.
+    threads (int): onnxruntime intra-op threads (default: the thread budget's cap).
+    Attributes:
+    source (dict or None): sha256 of the pickles the graph was exported from.
+    """
+
+    def __init__(self, path, threads=None):
+        import onnxruntime as ort
+
+        from thread_budget import budget
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or budget.max_threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.source = {key[len('source_'):]: value for key, value in metadata.items() if key.startswith('source_')} or None
+
+    def predict_proba_answers(self, answers):
+        """
+        Returns:
+        np.ndarray: (n_rows, 2) float64 probabilities.
+        """
+        probabilities = self.session.run([OUTPUT_NAME], {INPUT_NAME: answers_matrix(answers)})[0]
+        return probabilities.astype(np.float64)
+
+
+def check_parity(model, frozen, backend, answers_list, atol=1e-5):
+    """
+    Compare the ONNX graph with frozen encoder + `model.predict_proba`.
+    The ONNX tree ensemble works in float32, hence the looser default tolerance.
+    Returns:
+    float: Largest absolute probability difference; raises AssertionError above `atol`.
+    """
+    expected = model.predict_proba(frozen.encode_records(answers_list))[:, 1]
+    actual = backend.predict_proba_answers(answers_list)[:, 1]
+    max_diff = float(np.abs(expected - actual).max())
+    if max_diff > atol:
+        raise AssertionError(f'ONNX graph differs from predict_proba by {max_diff}')
+    return max_diff
+
+
+if __name__ == '__main__':
+    # Export best_model.pkl + cbe_encoder.pkl to heart_model.onnx, check parity and time both paths:
+    import os
+    import time
+
+    import onnx
+
+    from fast_encoder import get_frozen_encoder, parity_answers
+    from resources import artifact_path, get_model, source_digests
+
+    model = get_model()
+    frozen = get_frozen_encoder()
+    path = artifact_path('heart_model.onnx')
+    onnx.save(export_onnx(model, frozen, source_digests()), path)
+    print(f'Exported encoder + {len(model.estimators_)} members to {path} ({os.path.getsize(path) / 1e6:.1f} MB)')
+
+    backend = OnnxBackend(path)
+    answers_list = parity_answers(frozen)
+    print(f'Parity with predict_proba: max abs diff {check_parity(model, frozen, backend, answers_list):.2e}')
+
+    def pickled(rows):
+        return model.predict_proba(frozen.encode_records(rows))
+
+    for n_rows in (1, 100, len(answers_list)):
+        rows = answers_list[:n_rows]
+        for label, predict in (('encoder + pickle', pickled), ('onnxruntime', backend.predict_proba_answers)):
+            start = time.perf_counter()
+            for _ in range(20):
+                predict(rows)
+            seconds = (time.perf_counter() - start) / 20
+            print(f'{n_rows:>5} rows  {label:<17} {seconds * 1000:8.2f} ms  {n_rows / seconds:12,.0f} rows/s')
@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+# Same look as `px.pie(pie_df, names='Feature', values='Importance')`:
+HOVER_TEMPLATE = 'Feature=%{label}<br>Importance=%{value}<extra></extra>'
+
+
+class PieFigureCache:
+    """
+    Contribution pie charts built from plain arrays and memoized.
+    The chart only depends on the triggered features and their importance
+    shares, so figures are keyed on the labels and the shares rounded to
+    `decimals` percentage points (finer than the labels plotly prints) and built
+    from those rounded values. A miss builds one `go.Pie` trace on a layout that
+    is created once (default template, px.pie's legend and margins), with no
+    DataFrame and no plotly.express machinery. st.plotly_chart still
+    serializes the figure on every render.
+    Parameters:
+    max_entries (int): LRU bound on cached figures.
+    decimals (int): Rounding of the importance shares in the cache key.
+    """
+
+    def __init__(self, max_entries=1024, decimals=1):
+        self.max_entries = max_entries
+        self.decimals = decimals
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._layout = None
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, labels, values):
+        return tuple(labels), tuple(round(float(value), self.decimals) for value in values)
+
+    def _build(self, labels, values):
+        import plotly.graph_objects as go
+
+        if self._layout is None:
+            # Validated once; plotly applies its default template here:
+            self._layout = go.Figure(layout={'legend': {'tracegroupgap': 0}, 'margin': {'t': 60}}).layout
+        trace = go.Pie(labels=list(labels), values=list(values), hovertemplate=HOVER_TEMPLATE,
+                       domain={'x': [0.0, 1.0], 'y': [0.0, 1.0]}, legendgroup='', name='', showlegend=True)
+        return go.Figure(data=[trace], layout=self._layout)
+
+    def figure(self, labels, values):
+        """
+        Return the pie chart of `values` by `labels` (shared: do not modify it).
+        """
+        key = self.key(labels, values)
+        with self._lock:
+            figure = self._entries.get(key)
+            if figure is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return figure
+            self.misses += 1
+        figure = self._build(*key)
+        with self._lock:
+            self._entries[key] = figure
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return figure
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+# The chart cache shared by every session of this process:
+pie_charts = PieFigureCache()
@@ -0,0 +1,115 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from resources import artifact_path
+
+
+class RequestProfiler:
+    """
+    Opt-in cProfile capture of whole assessments.
+    A request is profiled when it is sampled (`sample_rate`) or forced (debug
+    flag), and forcing only works when the operator allowed it (`allow_force`):
+    the flag comes from the URL, so any visitor could set it. Each capture is
+    written to `directory` as a `.prof` file (for pstats or snakeviz) plus a
+    `.txt` summary of the hottest functions; only the newest `keep` captures are
+    kept. One capture runs at a time: cProfile cannot profile two threads at
+    once on every Python version, and a sampled request that finds the profiler
+    busy simply runs unprofiled.
+    Parameters:
+    directory (str): Output folder, relative to the app folder.
+    sample_rate (float): Fraction of requests profiled (0 = only forced ones).
+    keep (int): Captures kept before the oldest are deleted (at least 1).
+    top (int): Functions listed in each summary.
+    allow_force (bool): Whether forced requests are profiled.
+    """
+
+    def __init__(self, directory='profiles', sample_rate=0.0, keep=50, top=25, allow_force=False):
+        self.directory = artifact_path(directory)
+        self.sample_rate = sample_rate
+        self.keep = max(1, keep)
+        self.top = top
+        self.allow_force = allow_force
+        self.captured = 0
+        self._busy = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build the profiler from HEART_PROFILE_RATE, HEART_PROFILE_DIR,
+        HEART_PROFILE_KEEP and HEART_PROFILE_ALLOW_FORCE (1 = honour forced requests).
+        """
+        return cls(
+            directory=os.environ.get('HEART_PROFILE_DIR', 'profiles'),
+            sample_rate=float(os.environ.get('HEART_PROFILE_RATE', 0)),
+            keep=int(os.environ.get('HEART_PROFILE_KEEP', 50)),
+            allow_force=os.environ.get('HEART_PROFILE_ALLOW_FORCE') == '1',
+        )
+
+    def should_profile(self, force=False):
+        return (force and self.allow_force) or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    @contextmanager
+    def profile(self, label='assessment', force=False):
+        """
+        Profile the enclosed block when it is sampled or forced.
+        Yields:
+        str or None: Path the summary will be written to, or None when not profiled.
+        """
+        if not self.should_profile(force) or not self._busy.acquire(blocking=False):
+            yield None
+            return
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        base = os.path.join(self.directory, f'{stamp}-{os.getpid()}-{self.captured:05d}-{label}')
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                yield f'{base}.txt'
+            finally:
+                profiler.disable()
+            self._write(profiler, base, label, time.perf_counter() - start)
+        finally:
+            self._busy.release()
+
+    def _write(self, profiler, base, label, seconds):
+        os.makedirs(self.directory, exist_ok=True)
+        # Make room first, so the folder never holds more than `keep` captures:
+        self._rotate(self.keep - 1)
+        profiler.dump_stats(f'{base}.prof')
+        with open(f'{base}.txt', 'w') as f:
+            f.write(f'{label}: {seconds * 1000:.1f} ms wall time\n\n')
+            f.write(summarize(profiler, self.top))
+        self.captured += 1
+
+    def _rotate(self, keep):
+        captures = sorted(name[:-len('.prof')] for name in os.listdir(self.directory) if name.endswith('.prof'))
+        for name in captures[:max(0, len(captures) - keep)]:
+            for extension in ('.prof', '.txt'):
+                try:
+                    os.remove(os.path.join(self.directory, name + extension))
+                except FileNotFoundError:
+                    pass
+
+
+def summarize(profiler, top=25):
+    """
+    Text summary of a capture: the `top` functions by cumulative time, then by own time.
+    """
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out).strip_dirs()
+    out.write('Top functions by cumulative time:\n')
+    stats.sort_stats('cumulative').print_stats(top)
+    out.write('Top functions by own time:\n')
+    stats.sort_stats('tottime').print_stats(top)
+    return out.getvalue()
+
+
+# The profiler shared by every session of this process:
+profiler = RequestProfiler.from_env()
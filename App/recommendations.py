@@ -0,0 +1,155 @@
+# Risk bands of the app, in percent: (lower bound, band name).
+RISK_BANDS = [(70, 'very high'), (40, 'high'), (25, 'moderate')]
+RECOMMENDATION_THRESHOLD = 25
+
+OLDER_AGES = {"Age_55_to_59", "Age_60_to_64", "Age_65_to_69", "Age_70_to_74", "Age_75_to_79", "Age_80_or_older"}
+NOT_GOOD_DAYS = {"1_to_13_days_not_good", "14_plus_days_not_good"}
+
+
+class Rule:
+    """
+    One recommendation rule.
+    Attributes:
+    feature (str): Model feature the rule looks at.
+    display_name (str): Label used in the contribution pie chart.
+    template (str): Message; `{importance}` is the feature's share of the risk in percent.
+    categories (set, optional): Answers that trigger the rule.
+    unless (set, optional): Answers that do NOT trigger the rule (every other answer does).
+    """
+
+    def __init__(self, feature, display_name, template, categories=None, unless=None):
+        self.feature = feature
+        self.display_name = display_name
+        self.template = template
+        self.categories = frozenset(categories) if categories is not None else None
+        self.unless = frozenset(unless) if unless is not None else None
+
+    def triggers(self, answer):
+        if self.categories is not None:
+            return answer in self.categories
+        return answer not in self.unless
+
+
+# feature -> triggering categories -> message template -> display name
+RULES = [
+    Rule('ever_diagnosed_with_heart_attack', 'Heart Attack',
+         "- History of heart attack contributed {importance:.2f}% to your risk. Regularly visit your cardiologist and adhere to prescribed medications. Monitor any new or worsening symptoms and seek immediate medical attention if needed.",
+         categories={"yes"}),
+    Rule('ever_diagnosed_with_a_stroke', 'Stroke',
+         "- History of stroke contributed {importance:.2f}% to your risk. Follow your neurologist's recommendations and take prescribed medications consistently. Engage in approved physical therapy or exercises to regain strength and mobility.",
+         categories={"yes"}),
+    Rule('age_category', 'Age',
+         "- Age category contributed {importance:.2f}% to your risk. While you can't change your age, maintaining a healthy lifestyle can mitigate risks associated with aging. Ensure regular check-ups, eat a balanced diet, stay active, and avoid smoking.",
+         categories=OLDER_AGES),
+    Rule('general_health', 'General Health',
+         "- General health contributed {importance:.2f}% to your risk. Focus on improving your overall health through a balanced diet and regular check-ups.",
+         categories={"fair", "poor"}),
+    Rule('ever_told_you_have_kidney_disease', 'Kidney Disease',
+         "- Kidney disease contributed {importance:.2f}% to your risk. Regularly monitor your kidney function and follow your doctor's advice to manage your condition. Stay hydrated and maintain a kidney-friendly diet.",
+         categories={"yes"}),
+    Rule('ever_told_you_had_diabetes', 'Diabetes',
+         "- Diabetes contributed {importance:.2f}% to your risk. Manage your diabetes through diet, exercise, and medication as prescribed by your doctor.",
+         categories={"yes"}),
+    Rule('smoking_status', 'Smoking',
+         "- Smoking status contributed {importance:.2f}% to your risk. Quit smoking to significantly reduce your risk of heart disease.",
+         unless={"never_smoked"}),
+    Rule('exercise_status_in_past_30_Days', 'Exercise',
+         "- Lack of exercise contributed {importance:.2f}% to your risk. Engage in regular physical activity to improve your heart health.",
+         categories={"no"}),
+    Rule('binge_drinking_status', 'Binge Drinking',
+         "- Binge drinking contributed {importance:.2f}% to your risk. Reducing or eliminating alcohol consumption can significantly lower your risk of heart disease. Consider seeking support for alcohol moderation or cessation if needed.",
+         categories={"yes"}),
+    Rule('drinks_category', 'Alcohol',
+         "- Alcohol consumption contributed {importance:.2f}% to your risk. Limit alcohol consumption to lower your risk.",
+         categories={"high_consumption_10.01_to_20_drinks", "very_high_consumption_more_than_20_drinks"}),
+    Rule('sleep_category', 'Sleep',
+         "- Sleep category contributed {importance:.2f}% to your risk. Consider aiming for 7-9 hours of quality sleep each night. Adequate sleep is crucial for maintaining heart health.",
+         categories={"short_sleep_4_to_5_hours", "very_short_sleep_0_to_3_hours"}),
+    Rule('physical_health_status', 'Physical Health',
+         "- Physical health contributed {importance:.2f}% to your risk. Engage in regular physical activity and consult a healthcare provider if you have persistent physical health issues.",
+         categories=NOT_GOOD_DAYS),
+    Rule('mental_health_status', 'Mental Health',
+         "- Mental health contributed {importance:.2f}% to your risk. Consider seeking support from a mental health professional and practice stress-reducing activities.",
+         categories=NOT_GOOD_DAYS),
+    Rule('asthma_Status', 'Asthma',
+         "- Asthma contributed {importance:.2f}% to your risk. Manage your asthma by following your treatment plan, avoiding asthma triggers, and using your medications as prescribed.",
+         categories={"current_asthma", "former_asthma"}),
+    Rule('ever_told_you_had_a_depressive_disorder', 'Depression',
+         "- Depressive disorder contributed {importance:.2f}% to your risk. Consider seeking support from a mental health professional, practicing stress-reducing activities, and maintaining a healthy lifestyle to manage depressive symptoms.",
+         categories={"yes"}),
+    Rule('difficulty_walking_or_climbing_stairs', 'Mobility',
+         "- Difficulty walking or climbing stairs contributed {importance:.2f}% to your risk. Consider consulting with a healthcare provider for appropriate interventions and exercises to improve mobility and strength.",
+         categories={"yes"}),
+    Rule('length_of_time_since_last_routine_checkup', 'Checkup Time',
+         "- Time since last routine checkup contributed {importance:.2f}% to your risk. Regular health checkups are important for early detection and management of health conditions. Schedule regular appointments with your healthcare provider to monitor and maintain your heart health.",
+         unless={"past_year"}),
+    Rule('could_not_afford_to_see_doctor', 'Doctor Access',
+         "- Difficulty affording to see a doctor contributed {importance:.2f}% to your risk. Explore community health services, sliding scale clinics, or health insurance options to ensure you have access to necessary medical care.",
+         categories={"yes"}),
+    Rule('health_care_provider', 'Healthcare Provider',
+         "- Not having a primary health care provider contributed {importance:.2f}% to your risk. Establishing a relationship with a primary care provider can help manage and prevent health issues. Consider finding a primary health care provider to ensure regular check-ups and consistent medical advice.",
+         categories={"no"}),
+    Rule('BMI', 'BMI',
+         "- BMI contributed {importance:.2f}% to your risk. Maintaining a healthy weight through a balanced diet and regular exercise can help reduce your risk of heart disease. Consider consulting a healthcare provider for personalized advice.",
+         categories={"overweight_bmi_25_to_29_9", "obese_bmi_30_or_more"}),
+]
+
+
+def risk_band(risk):
+    """
+    Return the band name of a risk in percent: 'very high', 'high', 'moderate' or 'low'.
+    """
+    for lower, band in RISK_BANDS:
+        if risk > lower:
+            return band
+    return 'low'
+
+
+def risk_summary(risk):
+    band = risk_band(risk)
+    if band == 'low':
+        return "Your risk of heart disease is low. Keep up the good work and continue to maintain a healthy lifestyle."
+    return f"Your risk of heart disease is {band}. Here are some recommendations to reduce your risk:"
+
+
+class Recommendations:
+    """
+    Output of the rule table for one assessment.
+    Attributes:
+    summary (str): Risk band sentence.
+    items (list): (feature, display_name, importance, message) for every triggered
+        rule, most important first; empty when the risk is low.
+    pie_labels (list): Display names of the triggered features plus 'Other Factors'.
+    pie_values (list): Their importances; 'Other Factors' gets the remainder of 100%.
+    """
+
+    def __init__(self, summary, items):
+        self.summary = summary
+        self.items = items
+        self.pie_labels = [item[1] for item in items] + ['Other Factors']
+        self.pie_values = [item[2] for item in items] + [100 - sum(item[2] for item in items)]
+
+    @property
+    def messages(self):
+        return [item[3] for item in self.items]
+
+
+def build_recommendations(risk, answers, importances, rules=RULES):
+    """
+    Evaluate the rule table for one assessment.
+    Parameters:
+    risk (float): Predicted risk in percent.
+    answers (dict): feature -> answer.
+    importances (dict): feature -> share of the risk in percent (PredictionResult.importances).
+    rules (list): Rule table to evaluate.
+    Returns:
+    Recommendations
+    """
+    items = []
+    if risk > RECOMMENDATION_THRESHOLD:
+        for rule in rules:
+            if rule.triggers(answers[rule.feature]):
+                importance = importances[rule.feature]
+                items.append((rule.feature, rule.display_name, importance, rule.template.format(importance=importance)))
+        items.sort(key=lambda item: item[2], reverse=True)
+    return Recommendations(risk_summary(risk), items)
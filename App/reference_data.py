@@ -0,0 +1,78 @@
+import os
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from resources import artifact_path, registry
+
+REFERENCE_ZIP = 'brfss2022_data_wrangling_output.zip'
+TARGET = 'heart_disease'
+
+
+def cache_path_for(zip_path):
+    """
+    Return the path of the Feather cache that sits next to the zipped CSV.
+    """
+    root, _ = os.path.splitext(zip_path)
+    return root + '.feather'
+
+
+def build_cache(zip_path, cache_path):
+    """
+    Convert the wrangled BRFSS zip CSV into an uncompressed Feather file.
+    Every answer column is stored as a categorical (dictionary encoded) column and
+    the target is stored as a 0/1 int8 column, so readers never re-parse strings.
+    The file is written to a temporary name first and then moved into place, so
+    concurrent workers never read a half-written cache.
+    Parameters:
+    zip_path (str): Path of brfss2022_data_wrangling_output.zip.
+    cache_path (str): Destination Feather file.
+    """
+    df = pd.read_csv(zip_path, compression='zip', dtype='category')
+    # Vectorized replacement of the old row-wise `.apply(lambda x: 1 if x == 'yes' else 0)`:
+    df[TARGET] = (df[TARGET] == 'yes').astype('int8')
+
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    # Uncompressed so the file can be memory-mapped instead of decompressed on read:
+    feather.write_feather(df, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, cache_path)
+
+
+def is_cache_fresh(zip_path, cache_path):
+    return os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(zip_path)
+
+
+def load_reference_data(zip_path, columns=None):
+    """
+    Load the reference dataset, building the columnar cache on first use.
+    The Feather file is memory-mapped and the columns stay Arrow buffers backed by
+    it, so the pages are shared by every process reading the same cache.
+    Parameters:
+    zip_path (str): Path of brfss2022_data_wrangling_output.zip.
+    columns (list, optional): Subset of columns to read; only those are mapped.
+    Returns:
+    pyarrow.Table: Dictionary-encoded answer columns and the int8 `heart_disease` target.
+    """
+    cache_path = cache_path_for(zip_path)
+    if not is_cache_fresh(zip_path, cache_path):
+        build_cache(zip_path, cache_path)
+    return feather.read_table(cache_path, columns=columns, memory_map=True)
+
+
+# Registered lazily: nothing is read until the first `get_reference_data()` call,
+# after which every session of the process shares the same memory-mapped table.
+registry.register('reference_data', REFERENCE_ZIP, load_reference_data)
+
+
+def get_reference_data():
+    return registry.get('reference_data')
+
+
+def read_columns(columns):
+    """
+    Read only `columns` from the cache into a DataFrame for offline jobs
+    (warm_profiles.py, load_test.py, bench_early_exit.py) that need pandas
+    operations. Unlike `get_reference_data()` this copies the columns into the
+    calling process's memory.
+    """
+    return load_reference_data(artifact_path(REFERENCE_ZIP), columns=columns).to_pandas()
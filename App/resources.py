@@ -0,0 +1,246 @@
+import hashlib
+import os
+import pickle as pkl
+import threading
+import time
+
+# Artifacts are resolved relative to the app folder, so the registry works no
+# matter which directory `streamlit run` was launched from:
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def artifact_path(file_name):
+    """
+    Resolve an artifact file name against the app folder.
+    Parameters:
+    file_name (str): Relative or absolute path of the artifact.
+    Returns:
+    str: Absolute path of the artifact.
+    """
+    if os.path.isabs(file_name):
+        return file_name
+    return os.path.join(APP_DIR, file_name)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    Compute the sha256 of a file without reading it into memory at once.
+    Parameters:
+    path (str): Path of the file to hash.
+    chunk_size (int): Number of bytes read per step.
+    Returns:
+    str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _Entry:
+    """One registered artifact: its loader, the loaded value and its load stats."""
+
+    def __init__(self, name, path, loader):
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self.value = None
+        self.loaded = False
+        self.stat = None
+        self.digest = None
+        self.load_seconds = None
+        self.load_count = 0
+        self.loaded_at = None
+        # sha256 of the file on disk, for `digest` (which does not load it):
+        self.file_stat = None
+        self.file_digest = None
+        self.lock = threading.Lock()
+
+
+class ResourceRegistry:
+    """
+    Process-wide registry for the app artifacts (model, encoder, static assets).
+    Every artifact is loaded once and shared by all Streamlit sessions. On each
+    access the file's mtime/size are checked (a cheap `os.stat`); only when they
+    change is the content hashed, and the artifact is reloaded only if the hash
+    differs from the one that was loaded.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, file_name, loader):
+        """
+        Register an artifact under `name`. Registering the same name twice keeps
+        the first registration, so module reloads do not drop a loaded artifact.
+        Parameters:
+        name (str): Key used to fetch the artifact.
+        file_name (str): Artifact path, relative to the app folder.
+        loader (callable): Function taking the absolute path and returning the artifact.
+        """
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(name, artifact_path(file_name), loader)
+
+    def get(self, name):
+        """
+        Return the artifact registered under `name`, loading or reloading it when needed.
+        """
+        entry = self._entries[name]
+        stat = os.stat(entry.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if entry.loaded and entry.stat == signature:
+            return entry.value
+
+        with entry.lock:
+            # Another session may have finished the (re)load while we waited:
+            if entry.loaded and entry.stat == signature:
+                return entry.value
+            digest = file_digest(entry.path)
+            if entry.loaded and entry.digest == digest:
+                # Touched but unchanged (e.g. redeploy copied the same file):
+                entry.stat = signature
+                return entry.value
+            start = time.perf_counter()
+            value = entry.loader(entry.path)
+            entry.load_seconds = time.perf_counter() - start
+            entry.value = value
+            entry.digest = digest
+            entry.stat = signature
+            entry.load_count += 1
+            entry.loaded_at = time.time()
+            entry.loaded = True
+            return value
+
+    def fingerprint(self, name):
+        """
+        Return the sha256 of the artifact currently loaded under `name`.
+        """
+        self.get(name)
+        return self._entries[name].digest
+
+    def digest(self, name):
+        """
+        Return the sha256 of the file registered under `name` without loading it
+        (hashed again only when its mtime/size change). Lets NumPy-only processes
+        check an export against best_model.pkl without unpickling it.
+        """
+        entry = self._entries[name]
+        stat = os.stat(entry.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if entry.loaded and entry.stat == signature:
+            return entry.digest
+        with entry.lock:
+            if entry.file_stat != signature:
+                entry.file_digest = file_digest(entry.path)
+                entry.file_stat = signature
+            return entry.file_digest
+
+    def path(self, name):
+        return self._entries[name].path
+
+    def timings(self):
+        """
+        Return the load statistics of every registered artifact.
+        Returns:
+        dict: artifact name -> {'path', 'loaded', 'load_seconds', 'load_count', 'loaded_at', 'sha256'}.
+        """
+        return {
+            name: {
+                'path': entry.path,
+                'loaded': entry.loaded,
+                'load_seconds': entry.load_seconds,
+                'load_count': entry.load_count,
+                'loaded_at': entry.loaded_at,
+                'sha256': entry.digest,
+            }
+            for name, entry in self._entries.items()
+        }
+
+
+def load_pickle(path):
+    with open(path, 'rb') as f:
+        return pkl.load(f)
+
+
+def load_model(path):
+    # Serving-side thread settings replace the training-time n_jobs=-1 (see thread_budget.py)
+    from thread_budget import budget
+
+    return budget.configure_model(load_pickle(path))
+
+
+def load_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def load_text(path):
+    with open(path) as f:
+        return f.read()
+
+
+# The one registry shared by every session of this process:
+registry = ResourceRegistry()
+# HEART_MODEL_FILE=best_model.compact.pkl serves the boosters-only model (see compaction.py):
+registry.register('model', os.environ.get('HEART_MODEL_FILE', 'best_model.pkl'), load_model)
+registry.register('encoder', 'cbe_encoder.pkl', load_pickle)
+registry.register('heart_disease.jpg', 'heart_disease.jpg', load_bytes)
+registry.register('style_v1.css', 'style_v1.css', load_text)
+registry.register('style.css', 'style.css', load_text)
+
+
+def get_model():
+    return registry.get('model')
+
+
+def get_encoder():
+    return registry.get('encoder')
+
+
+def get_asset(name):
+    return registry.get(name)
+
+
+def model_version():
+    """
+    Short identifier of the served model: the sha256 prefixes of the model and
+    encoder artifacts, so results from different artifacts never get mixed up.
+    backends.backend_version() extends it for exported backends.
+    """
+    return source_version(source_digests())
+
+
+def source_digests():
+    """
+    sha256 of the model and encoder pickles, as recorded by every export
+    (flat_trees.py, onnx_export.py, model_bundle.py) to name its source.
+    """
+    return {'model_sha256': registry.digest('model'), 'encoder_sha256': registry.digest('encoder')}
+
+
+def source_version(source):
+    """
+    model_version() of the pickles described by `source` (see `source_digests`).
+    """
+    return f"{source['model_sha256'][:12]}-{source['encoder_sha256'][:12]}"
+
+
+def check_source(source, export_path):
+    """
+    Refuse an export that was not built from the pickles next to it.
+    A pickle that is not deployed is not compared (an export may ship alone).
+    Parameters:
+    source (dict or None): Digests recorded in the export (see `source_digests`).
+    export_path (str): The export, for the error message.
+    Raises:
+    ValueError: The export records no source, or another model or encoder.
+    """
+    if not source:
+        raise ValueError(f'{export_path} does not record the pickles it was exported from; export it again')
+    for key, name in (('model_sha256', 'model'), ('encoder_sha256', 'encoder')):
+        if os.path.exists(registry.path(name)) and registry.digest(name) != source[key]:
+            raise ValueError(f'{export_path} was exported from another {os.path.basename(registry.path(name))} '
+                             f'(sha256 {source[key][:12]}, deployed {registry.digest(name)[:12]}); export it again')
@@ -0,0 +1,63 @@
+# The 22 answers the model was trained on, in the column order of the encoder and
+# of the model (see `features` in Notebooks/Modeling/Modeling.py):
+FEATURES = [
+    'gender', 'race', 'general_health',
+    'health_care_provider', 'could_not_afford_to_see_doctor',
+    'length_of_time_since_last_routine_checkup',
+    'ever_diagnosed_with_heart_attack', 'ever_diagnosed_with_a_stroke',
+    'ever_told_you_had_a_depressive_disorder',
+    'ever_told_you_have_kidney_disease', 'ever_told_you_had_diabetes',
+    'BMI', 'difficulty_walking_or_climbing_stairs',
+    'physical_health_status', 'mental_health_status', 'asthma_Status',
+    'smoking_status', 'binge_drinking_status',
+    'exercise_status_in_past_30_Days', 'age_category', 'sleep_category',
+    'drinks_category',
+]
+
+# Answer vocabulary of every feature, in the order the app's selectboxes show them:
+OPTIONS = {
+    'gender': ['female', 'male', 'nonbinary'],
+    'race': ['white_only_non_hispanic', 'black_only_non_hispanic', 'asian_only_non_hispanic', 'american_indian_or_alaskan_native_only_non_hispanic', 'multiracial_non_hispanic', 'hispanic', 'native_hawaiian_or_other_pacific_islander_only_non_hispanic'],
+    'general_health': ['excellent', 'very_good', 'good', 'fair', 'poor'],
+    'health_care_provider': ['yes_only_one', 'more_than_one', 'no'],
+    'could_not_afford_to_see_doctor': ['yes', 'no'],
+    'length_of_time_since_last_routine_checkup': ['past_year', 'past_2_years', 'past_5_years', '5+_years_ago', 'never'],
+    'ever_diagnosed_with_heart_attack': ['yes', 'no'],
+    'ever_diagnosed_with_a_stroke': ['yes', 'no'],
+    'ever_told_you_had_a_depressive_disorder': ['yes', 'no'],
+    'ever_told_you_have_kidney_disease': ['yes', 'no'],
+    'ever_told_you_had_diabetes': ['yes', 'no', 'no_prediabetes', 'yes_during_pregnancy'],
+    'BMI': ['underweight_bmi_less_than_18_5', 'normal_weight_bmi_18_5_to_24_9', 'overweight_bmi_25_to_29_9', 'obese_bmi_30_or_more'],
+    'difficulty_walking_or_climbing_stairs': ['yes', 'no'],
+    'physical_health_status': ['zero_days_not_good', '1_to_13_days_not_good', '14_plus_days_not_good'],
+    'mental_health_status': ['zero_days_not_good', '1_to_13_days_not_good', '14_plus_days_not_good'],
+    'asthma_Status': ['never_asthma', 'current_asthma', 'former_asthma'],
+    'smoking_status': ['never_smoked', 'former_smoker', 'current_smoker_some_days', 'current_smoker_every_day'],
+    'binge_drinking_status': ['yes', 'no'],
+    'exercise_status_in_past_30_Days': ['yes', 'no'],
+    'age_category': ['Age_18_to_24', 'Age_25_to_29', 'Age_30_to_34', 'Age_35_to_39', 'Age_40_to_44', 'Age_45_to_49', 'Age_50_to_54', 'Age_55_to_59', 'Age_60_to_64', 'Age_65_to_69', 'Age_70_to_74', 'Age_75_to_79', 'Age_80_or_older'],
+    'sleep_category': ['very_short_sleep_0_to_3_hours', 'short_sleep_4_to_5_hours', 'normal_sleep_6_to_8_hours', 'long_sleep_9_to_10_hours', 'very_long_sleep_11_or_more_hours'],
+    'drinks_category': ['did_not_drink', 'very_low_consumption_0.01_to_1_drinks', 'low_consumption_1.01_to_5_drinks', 'moderate_consumption_5.01_to_10_drinks', 'high_consumption_10.01_to_20_drinks', 'very_high_consumption_more_than_20_drinks'],
+}
+
+
+def validate_answers(answers):
+    """
+    Check an answer dict against the selectbox vocabularies.
+    Parameters:
+    answers (dict): feature -> answer.
+    Returns:
+    list: Human readable problems; empty when the answers are valid.
+    """
+    if not isinstance(answers, dict):
+        return ['answers must be a JSON object keyed by feature name']
+    errors = []
+    for feature in FEATURES:
+        if feature not in answers:
+            errors.append(f'missing answer: {feature}')
+        elif answers[feature] not in OPTIONS[feature]:
+            errors.append(f'invalid answer for {feature}: {answers[feature]!r} (expected one of {OPTIONS[feature]})')
+    for feature in answers:
+        if feature not in OPTIONS:
+            errors.append(f'unknown feature: {feature}')
+    return errors
@@ -0,0 +1,188 @@
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+from assessment import assess_batch
+from assessment_cache import get_assessment_cache
+from micro_batcher import MicroBatcher
+from recommendations import build_recommendations, risk_band
+from backends import backend_version, get_backend, get_backend_encoder
+from resources import registry
+from schema import validate_answers
+
+MAX_BATCH = 1000
+
+
+class ScoringService:
+    """
+    The app's assessment logic without Streamlit: the same model, frozen encoder,
+    explainer pool, assessment cache and recommendation rules as heart_app.py.
+    """
+
+    def __init__(self, max_batch=32, max_wait=0.005):
+        from explainers import get_explainer_pool
+        from warm_profiles import ensure_warm
+
+        self.started_at = time.time()
+        self.model = get_backend()
+        self.encoder = get_backend_encoder()
+        self.explainer_pool = get_explainer_pool()
+        self.model_version = backend_version()
+        self.cache = ensure_warm(get_assessment_cache(), self.model_version, self.encoder)
+        metrics.set_model(self.model_version)
+        # Concurrent single-row requests share one predict_proba/SHAP call per batch:
+        self.batcher = MicroBatcher(self.assess, max_batch=max_batch, max_wait=max_wait)
+
+    def assess(self, answers_list):
+        """
+        Assess a batch of validated answer dicts: cache hits are served directly and
+        all misses are scored together in one pipeline call.
+        Returns:
+        list: PredictionResult per answer dict, in input order.
+        """
+        results = [self.cache.get(answers, self.model_version) for answers in answers_list]
+        missing = [i for i, result in enumerate(results) if result is None]
+        for result in results:
+            if result is not None:
+                metrics.record_result(result, observe_stages=False)
+        if missing:
+            computed = assess_batch([answers_list[i] for i in missing], self.model, self.encoder, self.explainer_pool)
+            for k, (i, result) in enumerate(zip(missing, computed)):
+                # The stage timings are shared by the whole batch; observe them once:
+                metrics.record_result(result, observe_stages=k == 0)
+                self.cache.put(answers_list[i], self.model_version, result)
+                results[i] = result
+        return results
+
+    def score(self, answers_list):
+        """
+        Assess a batch and format it as JSON-ready dicts.
+        """
+        return [self.format(result) for result in self.assess(answers_list)]
+
+    def score_one(self, answers):
+        """
+        Assess a single answer dict through the micro-batcher.
+        """
+        return self.format(self.batcher(answers))
+
+    @staticmethod
+    def format(result):
+        with metrics.time_stage('recommendations'):
+            advice = build_recommendations(result.risk, result.answers, result.importances)
+        return {
+            'risk': round(result.risk, 4),
+            'risk_band': risk_band(result.risk),
+            'summary': advice.summary,
+            'recommendations': advice.messages,
+            'contributions': {label: round(value, 4) for label, value in zip(advice.pie_labels, advice.pie_values)},
+            'importances': {feature: round(share, 4) for feature, share in result.sorted_importances()},
+            'source': result.source,
+        }
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'model_version': self.model_version,
+            'warm': {
+                'explainers': len(self.explainer_pool),
+                'explainers_warmed': self.explainer_pool.warm_seconds is not None,
+                'warm_profiles': self.cache.stats()['warm_entries'],
+            },
+            'cache': self.cache.stats(),
+            'batching': self.batcher.stats(),
+            'artifacts': {name: stats['load_seconds'] for name, stats in registry.timings().items() if stats['loaded']},
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+        }
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health       -> model version and warm state
+    GET  /metrics      -> stage latencies and counters in Prometheus text format
+    POST /score        -> body: answer object; returns one assessment
+    POST /score/batch  -> body: {"profiles": [answer objects]}; returns {"results": [...]}
+    """
+
+    service = None
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, self.service.health())
+        elif self.path == '/metrics':
+            self._send_body(200, metrics.registry.render().encode(), metrics.CONTENT_TYPE)
+        else:
+            self._send(404, {'error': f'unknown endpoint {self.path}'})
+
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+        except ValueError:
+            self._send(400, {'error': 'request body is not valid JSON'})
+            return
+
+        if self.path == '/score':
+            profiles = [body]
+        elif self.path == '/score/batch':
+            profiles = body.get('profiles') if isinstance(body, dict) else None
+            if not isinstance(profiles, list) or not profiles:
+                self._send(400, {'error': 'body must be {"profiles": [answer objects]}'})
+                return
+            if len(profiles) > MAX_BATCH:
+                self._send(413, {'error': f'at most {MAX_BATCH} profiles per batch'})
+                return
+        else:
+            self._send(404, {'error': f'unknown endpoint {self.path}'})
+            return
+
+        errors = {i: problems for i, problems in enumerate(map(validate_answers, profiles)) if problems}
+        if errors:
+            self._send(400, {'errors': errors[0] if self.path == '/score' else errors})
+            return
+
+        try:
+            if self.path == '/score':
+                self._send(200, self.service.score_one(body))
+            else:
+                self._send(200, {'results': self.service.score(profiles)})
+        except Exception as e:
+            metrics.errors_total.inc('api')
+            self._send(500, {'error': str(e)})
+
+    def _send(self, status, payload):
+        self._send_body(status, json.dumps(payload).encode(), 'application/json')
+
+    def _send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Access logs on stderr would dominate the cost of small requests
+        pass
+
+
+def serve(host='127.0.0.1', port=8502, max_batch=32, max_wait=0.005):
+    ScoringHandler.service = ScoringService(max_batch=max_batch, max_wait=max_wait)
+    server = ThreadingHTTPServer((host, port), ScoringHandler)
+    print(f'Scoring API for model {ScoringHandler.service.model_version} on http://{host}:{port}')
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON HTTP scoring API for the heart disease model.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--max-batch', type=int, default=32, help='Largest micro-batch of single-row requests.')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help='Longest wait for a micro-batch to fill.')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.max_batch, args.max_wait_ms / 1000)
+
+
+if __name__ == '__main__':
+    main()
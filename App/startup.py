@@ -0,0 +1,231 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# Seconds a cold start may take before `python startup.py --budget` fails;
+# overridden by --budget or HEART_STARTUP_BUDGET:
+DEFAULT_BUDGET = 20.0
+
+
+class ServingState:
+    """
+    Everything the app loads once per process before the first request.
+    Attributes:
+    model: The scoring backend (see backends.py).
+    version (str): Version of the backend's results (backends.backend_version()).
+    encoder (FrozenEncoder): The compiled CatBoost encoder.
+    inference_pool (InferencePool or None): Optional worker processes.
+    explainer_pool (ExplainerPool or None): Prebuilt, warmed per-member explainers;
+        None when the inference workers do the explaining.
+    assessment_cache (AssessmentCache): Result cache seeded with the warm profiles.
+    model_registry (ModelRegistry or None): Versions served from HEART_MODEL_DIR, if set;
+        the attributes above are then those of its default version.
+    timings (dict): step -> seconds spent in this call.
+    """
+
+    def __init__(self, model, version, encoder, inference_pool, explainer_pool, assessment_cache, timings,
+                 model_registry=None):
+        self.model = model
+        self.version = version
+        self.encoder = encoder
+        self.inference_pool = inference_pool
+        self.explainer_pool = explainer_pool
+        self.assessment_cache = assessment_cache
+        self.model_registry = model_registry
+        self.timings = timings
+
+    def route(self, answers):
+        """
+        Return the ServedModel assessing these answers: the registry's default or
+        candidate version when a model directory is watched, else the app's own
+        model (see model_registry.py).
+        """
+        if self.model_registry is not None:
+            return self.model_registry.route(answers)
+        from model_registry import ServedModel
+
+        return ServedModel('default', self.version, self.model, self.encoder, self.explainer_pool, self.inference_pool)
+
+
+def load_serving_state():
+    """
+    Load (or fetch from the process-wide caches) the app's serving state, in the
+    order the app needs it. Heavy libraries are imported by the step that first
+    needs them (unpickling the model imports lightgbm/imblearn, the explainer pool
+    imports shap), so each step's time includes its imports.
+    When HEART_MODEL_DIR is set, the model, encoder, explainers, version and warm
+    table all come from the registry's default version; the app's own
+    best_model.pkl is neither needed nor loaded.
+    Returns:
+    ServingState
+    """
+    from assessment import StageTimer
+    from assessment_cache import get_assessment_cache
+    from warm_profiles import ensure_warm
+
+    timer = StageTimer()
+    with timer('model_registry'):
+        from model_registry import get_model_registry
+
+        model_registry = get_model_registry()
+    if model_registry is not None:
+        default = model_registry.default
+        if default is None:
+            raise RuntimeError(f'no model version found in {model_registry.directory}')
+        with timer('assessment_cache'):
+            warm_table = default.warm_table if default.warm_table and os.path.exists(default.warm_table) else None
+            assessment_cache = ensure_warm(get_assessment_cache(), default.version, default.encoder, warm_table)
+        return ServingState(default.model, default.version, default.encoder, default.inference_pool,
+                            default.explainer_pool, assessment_cache, timer.timings, model_registry)
+
+    with timer('model'):
+        from backends import backend_version, get_backend
+
+        model = get_backend()
+        version = backend_version()
+    with timer('encoder'):
+        from backends import get_backend_encoder
+
+        encoder = get_backend_encoder()
+    with timer('inference_pool'):
+        # Forked before anything here runs a prediction (see worker_pool.py):
+        from worker_pool import get_inference_pool
+
+        inference_pool = get_inference_pool()
+    with timer('explainer_pool'):
+        # With inference workers this process never explains: warming its own pool
+        # would start OpenMP here, and multiprocessing.Pool forks replacement
+        # workers from this process whenever one dies.
+        explainer_pool = None
+        if inference_pool is None:
+            from explainers import get_explainer_pool
+
+            explainer_pool = get_explainer_pool()
+    with timer('assessment_cache'):
+        assessment_cache = ensure_warm(get_assessment_cache(), version, encoder)
+    return ServingState(model, version, encoder, inference_pool, explainer_pool, assessment_cache, timer.timings)
+
+
+_preload = None
+_preload_lock = threading.Lock()
+
+
+def preload_serving_state():
+    """
+    Start `load_serving_state` in a daemon thread, once per process, so the page
+    renders while the model, encoder, workers and explainers load. The first
+    assessment calls `load_serving_state` itself: every step fetches from a
+    locked process-wide cache, so it waits for whatever the preload has not
+    finished yet instead of loading it twice. A failed preload is retried there
+    and its error is shown to the user.
+    """
+    global _preload
+    with _preload_lock:
+        if _preload is None:
+            _preload = threading.Thread(target=load_serving_state, name='serving-preload', daemon=True)
+            _preload.start()
+    return _preload
+
+
+def app_import_statements(path=None):
+    """
+    The top-level import statements of heart_app.py, as source lines: what runs
+    before the first paint, kept in sync with the app by reading it.
+    """
+    path = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'heart_app.py')
+    with open(path) as f:
+        source = f.read()
+    return [ast.get_source_segment(source, node) for node in ast.parse(source).body
+            if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def parse_importtime(stderr, top=15):
+    """
+    Read the `python -X importtime` report.
+    Returns:
+    list: (module, cumulative seconds) of the top-level imports (the ones the
+        profiled code asked for, not their own dependencies), slowest first.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented under the module that triggered them:
+        if not name.startswith('   '):
+            imports.append((name.strip(), int(cumulative) / 1e6))
+    return sorted(imports, key=lambda item: -item[1])[:top]
+
+
+def profile_cold_start(app_imports=None):
+    """
+    Measure a cold start in a fresh interpreter.
+    The child runs heart_app.py's own top-level imports (the first paint waits
+    for them), then loads the serving state (the first assessment waits for
+    it), and reports the per-step and per-artifact times; `-X importtime`
+    gives the cost of every import on the way.
+    Parameters:
+    app_imports (list, optional): Import statements to run first; default
+        `app_import_statements()`.
+    Returns:
+    dict: {'import_seconds', 'total_seconds', 'steps', 'artifacts', 'imports'}
+    """
+    statements = app_imports if app_imports is not None else app_import_statements()
+    child = (
+        'import json, time\n'
+        'start = time.perf_counter()\n'
+        + ''.join(f'{statement}\n' for statement in statements) +
+        'import_seconds = time.perf_counter() - start\n'
+        'from startup import load_serving_state\n'
+        'state = load_serving_state()\n'
+        'from resources import registry\n'
+        'print(json.dumps({"import_seconds": import_seconds, "total_seconds": time.perf_counter() - start,\n'
+        '                  "steps": state.timings,\n'
+        '                  "artifacts": {name: info["load_seconds"] for name, info in registry.timings().items() if info["loaded"]}}))\n'
+    )
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    done = subprocess.run([sys.executable, '-X', 'importtime', '-c', child], cwd=app_dir,
+                          capture_output=True, text=True, check=True)
+    report = json.loads(done.stdout.strip().splitlines()[-1])
+    report['imports'] = parse_importtime(done.stderr)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile the app cold start and check it against a time budget.')
+    parser.add_argument('--budget', type=float, default=float(os.environ.get('HEART_STARTUP_BUDGET', DEFAULT_BUDGET)),
+                        help='Fail (exit status 1) when the cold start takes longer, in seconds.')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = profile_cold_start()
+    report['wall_seconds'] = time.perf_counter() - start
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print('Slowest imports (cumulative):')
+        for name, seconds in report['imports']:
+            print(f'  {name:<40} {seconds * 1000:9.1f} ms')
+        print('Startup steps:')
+        for step, seconds in report['steps'].items():
+            print(f'  {step:<40} {seconds * 1000:9.1f} ms')
+        print('Artifact loads:')
+        for name, seconds in report['artifacts'].items():
+            print(f'  {name:<40} {seconds * 1000:9.1f} ms')
+        print(f"App imports (before first paint): {report['import_seconds']:.2f}s")
+        print(f"Cold start: {report['total_seconds']:.2f}s (budget {args.budget:.2f}s, "
+              f"interpreter included: {report['wall_seconds']:.2f}s)")
+
+    if report['total_seconds'] > args.budget:
+        print(f"Cold start over budget: {report['total_seconds']:.2f}s > {args.budget:.2f}s", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
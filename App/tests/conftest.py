@@ -0,0 +1,83 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The app modules are imported by plain name, like `streamlit run heart_app.py` does:
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+
+def artifact(file_name):
+    """
+    Path of an app artifact; skips the test when it is not there (the pickles are
+    produced by Modeling.py and are not part of every checkout).
+    """
+    path = os.path.join(APP_DIR, file_name)
+    if not os.path.exists(path):
+        pytest.skip(f'{file_name} not found in {APP_DIR}')
+    return path
+
+
+def answer_profiles(n_profiles, seed=0):
+    """
+    Random valid answer dicts (every feature answered from its selectbox options).
+    """
+    from schema import FEATURES, OPTIONS
+
+    rng = random.Random(seed)
+    return [{feature: rng.choice(OPTIONS[feature]) for feature in FEATURES} for _ in range(n_profiles)]
+
+
+def synthetic_ensemble(n_features, n_members=2, seed=1981, n_rows=400):
+    """
+    A BundleEnsemble of small LightGBM members, each fitted on a bootstrap of
+    random data with its own column order (like EasyEnsemble's
+    `estimators_features_`), for tests that must not need best_model.pkl.
+    Returns:
+    tuple: (BundleEnsemble, the (n_rows, n_features) training matrix)
+    """
+    np = pytest.importorskip('numpy')
+    lgb = pytest.importorskip('lightgbm')
+    from model_bundle import BundleEnsemble, BundleMember
+
+    rng = np.random.default_rng(seed)
+    X = rng.random((n_rows, n_features))
+    # Noisy labels, so member probabilities spread over every risk band:
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-4 * (X[:, 0] + X[:, 1] - 1)))).astype(int)
+    features, members = [], []
+    for i in range(n_members):
+        columns = np.arange(n_features) if i == 0 else rng.permutation(n_features)
+        rows = rng.integers(0, n_rows, n_rows)
+        booster = lgb.train({'objective': 'binary', 'num_leaves': 7, 'verbose': -1, 'seed': i},
+                            lgb.Dataset(X[rows][:, columns], y[rows]), num_boost_round=10)
+        features.append(columns)
+        members.append(BundleMember(booster))
+    return BundleEnsemble(members, features, manifest=None), X
+
+
+@pytest.fixture(scope='session')
+def encoder():
+    """The fitted CatBoostEncoder (cbe_encoder.pkl)."""
+    pytest.importorskip('category_encoders')
+    from resources import load_pickle
+
+    return load_pickle(artifact('cbe_encoder.pkl'))
+
+
+@pytest.fixture(scope='session')
+def frozen(encoder):
+    from fast_encoder import FrozenEncoder
+
+    return FrozenEncoder.freeze(encoder)
+
+
+@pytest.fixture(scope='session')
+def model():
+    """The fitted EasyEnsembleClassifier (best_model.pkl)."""
+    pytest.importorskip('lightgbm')
+    pytest.importorskip('imblearn')
+    from resources import load_model
+
+    return load_model(artifact('best_model.pkl'))
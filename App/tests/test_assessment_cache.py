@@ -0,0 +1,128 @@
+import pytest
+
+from conftest import answer_profiles
+
+np = pytest.importorskip('numpy')
+
+import assessment_cache  # noqa: E402
+from assessment import PredictionResult  # noqa: E402
+from assessment_cache import AssessmentCache, cached_assess  # noqa: E402
+from schema import FEATURES  # noqa: E402
+
+
+def make_result(answers, risk=30.0):
+    n_features = len(FEATURES)
+    return PredictionResult(
+        answers=answers,
+        encoded=np.zeros((1, n_features), dtype=np.float32),
+        risk=risk,
+        contributions=np.full(n_features, 0.01),
+        importances={feature: 100 / n_features for feature in FEATURES},
+        timings={'encode': 0.001},
+    )
+
+
+@pytest.fixture
+def profiles():
+    return answer_profiles(5)
+
+
+def test_memory_tier_hit_and_miss(profiles):
+    cache = AssessmentCache()
+    assert cache.get(profiles[0], 'v1') is None
+    cache.put(profiles[0], 'v1', make_result(profiles[0], risk=42.0))
+
+    hit = cache.get(profiles[0], 'v1')
+    assert hit.source == 'memory'
+    assert hit.risk == 42.0
+    assert cache.get(profiles[1], 'v1') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+
+
+def test_entries_are_keyed_on_the_model_version(profiles, tmp_path):
+    cache = AssessmentCache(db_path=str(tmp_path / 'cache.sqlite'))
+    cache.put(profiles[0], 'v1', make_result(profiles[0]))
+    cache.seed('v1', [make_result(profiles[1]).to_dict()])
+
+    for answers in profiles[:2]:
+        assert cache.get(answers, 'v1') is not None
+        assert cache.get(answers, 'v2') is None
+
+
+def test_least_recently_used_entry_is_evicted_first(profiles):
+    cache = AssessmentCache(max_entries=2)
+    a, b, c = profiles[:3]
+    cache.put(a, 'v1', make_result(a))
+    cache.put(b, 'v1', make_result(b))
+    # Reading `a` makes `b` the least recently used entry:
+    assert cache.get(a, 'v1') is not None
+    cache.put(c, 'v1', make_result(c))
+
+    assert cache.get(b, 'v1') is None
+    assert cache.get(a, 'v1') is not None
+    assert cache.get(c, 'v1') is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['entries'] == 2
+
+
+def test_disk_tier_survives_a_restart_and_is_promoted(profiles, tmp_path):
+    db_path = str(tmp_path / 'cache.sqlite')
+    AssessmentCache(db_path=db_path).put(profiles[0], 'v1', make_result(profiles[0], risk=12.5))
+
+    cache = AssessmentCache(db_path=db_path)
+    first = cache.get(profiles[0], 'v1')
+    assert (first.source, first.risk) == ('disk', 12.5)
+    assert cache.get(profiles[0], 'v1').source == 'memory'
+    assert cache.get(profiles[0], 'v2') is None
+    assert (cache.stats()['disk_hits'], cache.stats()['hits'], cache.stats()['misses']) == (1, 1, 1)
+
+
+def test_warm_tier_is_never_evicted(profiles):
+    cache = AssessmentCache(max_entries=1)
+    cache.seed('v1', [make_result(profiles[0]).to_dict()])
+    for answers in profiles[1:]:
+        cache.put(answers, 'v1', make_result(answers))
+
+    assert cache.get(profiles[0], 'v1').source == 'warm'
+    assert cache.stats()['warm_hits'] == 1
+    cache.clear()
+    assert cache.get(profiles[0], 'v1').source == 'warm'
+    assert cache.get(profiles[-1], 'v1') is None
+
+
+def test_cached_assess_computes_once_per_version(profiles, monkeypatch):
+    calls = []
+
+    def assess(answers, model, encoder, explainer_pool):
+        calls.append(model)
+        return make_result(answers, risk=float(len(calls)))
+
+    monkeypatch.setattr(assessment_cache, 'assess', assess)
+    cache = AssessmentCache()
+    answers = profiles[0]
+
+    first = cached_assess(cache, answers, 'v1', 'model-1', None, None)
+    again = cached_assess(cache, answers, 'v1', 'model-1', None, None)
+    assert (first.source, again.source) == ('model', 'memory')
+    assert again.risk == first.risk
+    # A reloaded model gets a new version, so nothing cached for the old one is served
+    reloaded = cached_assess(cache, answers, 'v2', 'model-2', None, None)
+    assert reloaded.source == 'model'
+    assert calls == ['model-1', 'model-2']
+
+
+def test_worker_results_are_cached_under_the_workers_version(profiles):
+    class Pool:
+        model_version = 'v1'
+
+        def assess(self, answers_list):
+            return [PredictionResult.from_dict(make_result(answers).to_dict(), source='worker')
+                    for answers in answers_list]
+
+    cache = AssessmentCache()
+    # The served model is already v2, the workers were forked with v1:
+    result = cached_assess(cache, profiles[0], 'v2', None, None, None, inference_pool=Pool())
+    assert result.source == 'worker'
+    assert cache.get(profiles[0], 'v2') is None
+    assert cache.get(profiles[0], 'v1') is not None
@@ -0,0 +1,86 @@
+import pytest
+
+from conftest import synthetic_ensemble
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('lightgbm')
+
+from early_exit import EarlyExitEnsemble, band_index  # noqa: E402
+from recommendations import risk_band  # noqa: E402
+
+EPS_VALUES = [0.02, 0.05, 0.1, 0.3, 1.0]
+
+
+@pytest.fixture(scope='module')
+def ensemble():
+    return synthetic_ensemble(n_features=6, n_members=10)
+
+
+@pytest.fixture(scope='module')
+def rows(ensemble):
+    model, X = ensemble
+    rng = np.random.default_rng(3)
+    return np.vstack([X, rng.random((2000, X.shape[1]))])
+
+
+def member_probabilities(model, X):
+    return np.column_stack([member.booster_.predict(X[:, features])
+                            for member, features in zip(model.estimators_, model.estimators_features_)])
+
+
+def test_band_index_matches_risk_band():
+    probabilities = np.array([0.0, 0.25, 0.2500001, 0.4, 0.41, 0.7, 0.7000001, 1.0])
+    names = ['low', 'moderate', 'high', 'very high']
+    assert [names[i] for i in band_index(probabilities)] == [risk_band(p * 100) for p in probabilities]
+
+
+def test_rows_cover_every_band(ensemble, rows):
+    model, _ = ensemble
+    assert set(band_index(model.predict_proba(rows)[:, 1])) == {0, 1, 2, 3}
+
+
+@pytest.mark.parametrize('min_members', [1, 2, 5])
+def test_exact_bound_never_changes_the_band(ensemble, rows, min_members):
+    model, _ = ensemble
+    full = model.predict_proba(rows)[:, 1]
+    early = EarlyExitEnsemble(model, eps=1.0, min_members=min_members)
+    positive, used = early.predict(rows)
+
+    np.testing.assert_array_equal(band_index(positive), band_index(full))
+    assert used.min() >= min_members
+    np.testing.assert_allclose(positive[used == len(early.members)], full[used == len(early.members)], atol=1e-12)
+
+
+@pytest.mark.parametrize('eps', EPS_VALUES)
+def test_band_holds_whenever_the_bound_holds(ensemble, rows, eps):
+    # For any eps, a row whose remaining members really were within eps of the
+    # running mean when it stopped keeps the band of the full ensemble:
+    model, _ = ensemble
+    probabilities = member_probabilities(model, rows)
+    full = probabilities.mean(axis=1)
+    positive, used = EarlyExitEnsemble(model, eps=eps).predict(rows)
+
+    for i in range(len(rows)):
+        k = used[i]
+        np.testing.assert_allclose(positive[i], probabilities[i, :k].mean(), atol=1e-12)
+        if k == probabilities.shape[1] or np.abs(probabilities[i, k:] - positive[i]).max() <= eps:
+            assert band_index(positive[i]) == band_index(full[i])
+
+
+def test_smaller_eps_never_uses_more_members(ensemble, rows):
+    model, _ = ensemble
+    used = [EarlyExitEnsemble(model, eps=eps).predict(rows)[1] for eps in EPS_VALUES]
+    for smaller, larger in zip(used, used[1:]):
+        assert (smaller <= larger).all()
+    assert used[0].mean() < len(model.estimators_)
+
+
+def test_predict_proba_and_stats(ensemble, rows):
+    model, _ = ensemble
+    early = EarlyExitEnsemble(model, eps=0.1)
+    positive, used = early.predict(rows)
+    np.testing.assert_array_equal(early.predict_proba(rows), np.column_stack([1 - positive, positive]))
+
+    stats = early.stats()
+    assert (stats['eps'], stats['members'], stats['rows']) == (0.1, 10, 2 * len(rows))
+    assert stats['mean_members_used'] == pytest.approx(used.mean())
@@ -0,0 +1,43 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from fast_encoder import UNKNOWN, FrozenEncoder, check_parity, parity_answers  # noqa: E402
+
+
+def test_batch_encoding_matches_transform(encoder, frozen):
+    answers_list = parity_answers(frozen)
+    expected = encoder.transform(pd.DataFrame(answers_list, columns=frozen.columns)).to_numpy(dtype=np.float64)
+    np.testing.assert_allclose(frozen.encode_records(answers_list), expected, rtol=0, atol=1e-6)
+
+
+def test_single_row_encoding_matches_transform(encoder, frozen):
+    for answers in parity_answers(frozen, n_random=50):
+        expected = encoder.transform(pd.DataFrame([answers], columns=frozen.columns)).to_numpy(dtype=np.float64)
+        np.testing.assert_allclose(frozen.encode_one(answers), expected, rtol=0, atol=1e-6)
+
+
+def test_unknown_and_missing_answers_use_the_unknown_slot(frozen):
+    unknown = frozen.encode_one({column: UNKNOWN for column in frozen.columns})
+    missing = frozen.encode_one({})
+    expected = np.array([table[-1] for table in frozen.tables], dtype=np.float32)
+    np.testing.assert_array_equal(unknown[0], expected)
+    np.testing.assert_array_equal(missing[0], expected)
+
+
+def test_check_parity_reports_the_difference(encoder, frozen):
+    assert check_parity(encoder, frozen, parity_answers(frozen, n_random=100)) <= 1e-6
+
+    shifted = FrozenEncoder(frozen.columns, frozen.vocabularies, [table + 0.5 for table in frozen.tables])
+    with pytest.raises(AssertionError):
+        check_parity(encoder, shifted, parity_answers(frozen, n_random=10))
+
+
+def test_save_and_load_round_trip(frozen, tmp_path):
+    path = tmp_path / 'frozen_encoder.npz'
+    frozen.save(path)
+    loaded = FrozenEncoder.load(path)
+    answers_list = parity_answers(frozen, n_random=100)
+    assert loaded.columns == frozen.columns
+    np.testing.assert_array_equal(loaded.encode_records(answers_list), frozen.encode_records(answers_list))
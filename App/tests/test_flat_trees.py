@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from conftest import synthetic_ensemble
+
+np = pytest.importorskip('numpy')
+
+from flat_trees import FlatEnsemble, check_parity  # noqa: E402
+from schema import FEATURES  # noqa: E402
+
+
+@pytest.fixture(scope='module', params=['pickled', 'synthetic'])
+def scored(request):
+    """
+    (ensemble, encoded rows): best_model.pkl on the parity answers when it is
+    deployed, and always a synthetic LightGBM ensemble over the app's features.
+    """
+    if request.param == 'pickled':
+        from fast_encoder import parity_answers
+
+        frozen = request.getfixturevalue('frozen')
+        return request.getfixturevalue('model'), frozen.encode_records(parity_answers(frozen))
+    model, X = synthetic_ensemble(len(FEATURES), n_members=4)
+    return model, np.vstack([X, np.random.default_rng(5).random((200, len(FEATURES)))])
+
+
+@pytest.fixture(scope='module')
+def model(scored):
+    return scored[0]
+
+
+@pytest.fixture(scope='module')
+def encoded(scored):
+    return scored[1]
+
+
+@pytest.fixture(scope='module')
+def flat(model):
+    return FlatEnsemble.from_model(model)
+
+
+def test_flat_evaluator_matches_predict_proba(model, flat, encoded):
+    np.testing.assert_allclose(flat.predict_proba(encoded), model.predict_proba(encoded), rtol=0, atol=1e-9)
+    assert check_parity(model, flat, encoded) <= 1e-9
+
+
+def test_single_rows_match_the_batch(flat, encoded):
+    batch = flat.predict_proba(encoded[:20])
+    rows = np.vstack([flat.predict_proba(encoded[i:i + 1]) for i in range(20)])
+    np.testing.assert_allclose(rows, batch, rtol=0, atol=1e-12)
+
+
+def test_save_and_load_round_trip(flat, encoded, tmp_path):
+    flat.source = {'model_sha256': 'a' * 64, 'encoder_sha256': 'b' * 64}
+    path = tmp_path / 'flat_model.npz'
+    flat.save(path)
+    loaded = FlatEnsemble.load(path)
+    assert loaded.source == flat.source
+    np.testing.assert_array_equal(loaded.predict_proba(encoded), flat.predict_proba(encoded))
+
+
+def test_stale_export_is_refused(flat, tmp_path):
+    from backends import _load_flat
+    from resources import registry
+
+    path = str(tmp_path / 'flat_model.npz')
+    flat.source = None
+    flat.save(path)
+    with pytest.raises(ValueError, match='does not record'):
+        _load_flat(path)
+
+    if not any(os.path.exists(registry.path(name)) for name in ('model', 'encoder')):
+        pytest.skip('no deployed pickle to compare the export with')
+    flat.source = {'model_sha256': '0' * 64, 'encoder_sha256': '0' * 64}
+    flat.save(path)
+    with pytest.raises(ValueError, match='exported from another'):
+        _load_flat(path)
+
+
+def test_member_columns_and_missing_values():
+    # Members fitted on permuted columns (estimators_features_) and NaN inputs,
+    # without the pickles:
+    lgb = pytest.importorskip('lightgbm')
+    from model_bundle import BundleEnsemble, BundleMember
+
+    rng = np.random.default_rng(1981)
+    X = rng.normal(size=(400, 4))
+    X[rng.random(X.shape) < 0.1] = np.nan
+    y = (np.nan_to_num(X[:, 0]) + np.nan_to_num(X[:, 2]) > 0).astype(int)
+    features = [np.array([0, 1, 2, 3]), np.array([2, 0, 3, 1])]
+    members = [
+        BundleMember(lgb.train({'objective': 'binary', 'num_leaves': 7, 'verbose': -1},
+                               lgb.Dataset(X[:, columns], y), num_boost_round=20))
+        for columns in features
+    ]
+    ensemble = BundleEnsemble(members, features, manifest=None)
+    flat = FlatEnsemble.from_model(ensemble)
+    np.testing.assert_allclose(flat.predict_proba(X), ensemble.predict_proba(X), rtol=0, atol=1e-9)
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from micro_batcher import MicroBatcher  # noqa: E402
+
+
+class Recorder:
+    """
+    run_batch that doubles every item and records the batches it was given.
+    """
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if self.error is not None:
+            raise self.error
+        return [item * 2 for item in items]
+
+
+def test_full_batch_is_flushed_without_waiting():
+    run_batch = Recorder()
+    batcher = MicroBatcher(run_batch, max_batch=4, max_wait=30.0)
+    start = time.perf_counter()
+    futures = [batcher.submit(i) for i in range(4)]
+
+    assert [future.result(timeout=5) for future in futures] == [0, 2, 4, 6]
+    assert time.perf_counter() - start < 5
+    assert run_batch.batches == [[0, 1, 2, 3]]
+    assert batcher.stats()['batch_sizes'] == {4: 1}
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    run_batch = Recorder()
+    batcher = MicroBatcher(run_batch, max_batch=100, max_wait=0.05)
+    start = time.perf_counter()
+    futures = [batcher.submit(i) for i in range(3)]
+
+    assert [future.result(timeout=5) for future in futures] == [0, 2, 4]
+    assert time.perf_counter() - start >= 0.05
+    assert run_batch.batches == [[0, 1, 2]]
+
+
+def test_batch_exception_reaches_every_waiting_caller():
+    error = ValueError('model unavailable')
+    run_batch = Recorder(error)
+    batcher = MicroBatcher(run_batch, max_batch=3, max_wait=30.0)
+    futures = [batcher.submit(i) for i in range(3)]
+
+    for future in futures:
+        assert future.exception(timeout=5) is error
+    assert batcher.stats()['errors'] == 1
+
+    # The batcher keeps serving after a failed batch:
+    run_batch.error = None
+    batcher.max_wait = 0.01
+    assert batcher(21, timeout=5) == 42
+
+
+def test_short_result_list_fails_the_batch():
+    batcher = MicroBatcher(lambda items: [0], max_batch=2, max_wait=30.0)
+    futures = [batcher.submit(i) for i in range(2)]
+    for future in futures:
+        with pytest.raises(ValueError, match='1 results for 2 items'):
+            future.result(timeout=5)
+
+
+def test_concurrent_callers_get_their_own_results():
+    run_batch = Recorder()
+    batcher = MicroBatcher(run_batch, max_batch=8, max_wait=0.002)
+    results = {}
+
+    def caller(offset):
+        for i in range(offset, offset + 50):
+            results[i] = batcher(i, timeout=5)
+
+    threads = [threading.Thread(target=caller, args=(offset,)) for offset in range(0, 400, 50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: i * 2 for i in range(400)}
+    assert max(len(batch) for batch in run_batch.batches) <= 8
+    assert batcher.stats()['items'] == 400
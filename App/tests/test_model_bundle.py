@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+from conftest import answer_profiles, synthetic_ensemble
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('lightgbm')
+
+from fast_encoder import FrozenEncoder  # noqa: E402
+from model_bundle import MANIFEST, load_bundle, write_bundle  # noqa: E402
+from resources import registry  # noqa: E402
+from schema import FEATURES, OPTIONS  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def frozen():
+    """
+    Encoder tables over the app's vocabularies (unknown slot last), without cbe_encoder.pkl.
+    """
+    rng = np.random.default_rng(7)
+    vocabularies = [sorted(OPTIONS[feature]) for feature in FEATURES]
+    return FrozenEncoder(FEATURES, vocabularies, [rng.random(len(vocab) + 1) for vocab in vocabularies])
+
+
+@pytest.fixture(scope='module')
+def ensemble():
+    return synthetic_ensemble(len(FEATURES))[0]
+
+
+@pytest.fixture
+def source():
+    # The digests of whatever pickles are deployed, so the bundle is accepted as converted from them:
+    return {f'{name}_sha256': registry.digest(name) if os.path.exists(registry.path(name)) else '0' * 64
+            for name in ('model', 'encoder')}
+
+
+@pytest.fixture
+def bundle(tmp_path, ensemble, frozen, source):
+    path = str(tmp_path / 'model_bundle')
+    write_bundle(path, ensemble, frozen, training_data_sha256='f' * 64, metrics={'roc_auc': 0.8}, source=source)
+    return path
+
+
+def edit_manifest(path, change):
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    change(manifest)
+    with open(os.path.join(path, MANIFEST), 'w') as f:
+        json.dump(manifest, f)
+
+
+def test_written_bundle_loads_back(bundle, ensemble, frozen, source):
+    model, encoder, manifest = load_bundle(bundle)
+    answers_list = answer_profiles(50)
+    X = frozen.encode_records(answers_list)
+
+    np.testing.assert_array_equal(encoder.encode_records(answers_list), X)
+    np.testing.assert_allclose(model.predict_proba(X), ensemble.predict_proba(X), rtol=0, atol=1e-12)
+    assert [m.tolist() for m in model.estimators_features_] == [m.tolist() for m in ensemble.estimators_features_]
+    assert manifest['metrics'] == {'roc_auc': 0.8}
+    assert manifest['source'] == source == encoder.source
+
+
+def test_corrupted_file_is_rejected(bundle):
+    with open(os.path.join(bundle, 'member_1.txt'), 'a') as f:
+        f.write('\n')
+    with pytest.raises(ValueError, match='member_1.txt .* is corrupted'):
+        load_bundle(bundle)
+    # Without verification the hashes are not read:
+    load_bundle(bundle, verify=False)
+
+
+def test_file_without_a_recorded_sha256_is_rejected(bundle):
+    edit_manifest(bundle, lambda manifest: manifest['files'].pop('member_0.txt'))
+    with pytest.raises(ValueError, match='no sha256 for member_0.txt'):
+        load_bundle(bundle)
+
+
+@pytest.mark.parametrize('change, message', [
+    (lambda manifest: manifest.pop('members'), 'no members entry'),
+    (lambda manifest: manifest.update(format='something-else'), 'is not a heart-model-bundle'),
+    (lambda manifest: manifest.update(format_version=99), 'newer than this app'),
+    (lambda manifest: manifest.update(features=FEATURES[::-1]), 'feature order'),
+    (lambda manifest: manifest.update(source=None), 'does not record'),
+])
+def test_bad_manifest_is_rejected(bundle, change, message):
+    edit_manifest(bundle, change)
+    with pytest.raises(ValueError, match=message):
+        load_bundle(bundle)
+
+
+def test_missing_manifest_is_rejected(bundle):
+    os.remove(os.path.join(bundle, MANIFEST))
+    with pytest.raises(ValueError, match='has no manifest.json'):
+        load_bundle(bundle)
+
+
+def test_bundle_of_another_model_is_rejected(bundle):
+    if not os.path.exists(registry.path('encoder')):
+        pytest.skip('no deployed cbe_encoder.pkl to compare with')
+    edit_manifest(bundle, lambda manifest: manifest['source'].update(encoder_sha256='1' * 64))
+    with pytest.raises(ValueError, match='exported from another'):
+        load_bundle(bundle)
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from conftest import answer_profiles
+
+pytest.importorskip('numpy')
+
+from model_registry import ENCODER_FILE, MODEL_FILE, ModelRegistry, ServedModel  # noqa: E402
+
+
+def write_version(directory, name, model=b'model', encoder=b'encoder'):
+    folder = directory / name
+    folder.mkdir(exist_ok=True)
+    (folder / MODEL_FILE).write_bytes(model + name.encode())
+    (folder / ENCODER_FILE).write_bytes(encoder)
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    """
+    Registry over tmp_path whose loads are recorded instead of unpickling.
+    """
+    registry = ModelRegistry(str(tmp_path), keep=1)
+    registry.loads = []
+
+    def load(name, folder, model_digest, encoder_digest):
+        registry.loads.append(name)
+        return ServedModel(name, f'{model_digest[:12]}-{encoder_digest[:12]}', object(), object(), None)
+
+    monkeypatch.setattr(registry, '_load', load)
+    return registry
+
+
+def test_newest_version_becomes_the_default(registry, tmp_path):
+    write_version(tmp_path, 'v1')
+    assert registry.refresh() == ['v1']
+    assert registry.default.name == 'v1'
+
+    write_version(tmp_path, 'v2')
+    assert registry.refresh() == ['v2']
+    assert registry.default.name == 'v2'
+    assert registry.swaps == 2
+    assert registry.refresh() == []
+
+
+def test_evicted_versions_are_not_reloaded(registry, tmp_path):
+    for name in ('v1', 'v2', 'v3', 'v4'):
+        write_version(tmp_path, name)
+    assert registry.refresh() == ['v1', 'v2', 'v3', 'v4']
+    assert sorted(registry.stats()['versions']) == ['v3', 'v4']
+
+    for _ in range(3):
+        assert registry.refresh() == []
+    assert registry.loads == ['v1', 'v2', 'v3', 'v4']
+    assert sorted(registry.stats()['versions']) == ['v3', 'v4']
+
+
+def test_evicted_version_reloads_when_its_files_change(registry, tmp_path):
+    for name in ('v1', 'v2', 'v3'):
+        write_version(tmp_path, name)
+    registry.refresh()
+    # Rewritten with the same content: hashed again, not reloaded
+    write_version(tmp_path, 'v1')
+    os.utime(tmp_path / 'v1' / MODEL_FILE, ns=(0, 0))
+    assert registry.refresh() == []
+
+    write_version(tmp_path, 'v1', model=b'retrained')
+    assert registry.refresh() == ['v1']
+
+
+def test_removed_default_falls_back_to_the_newest_remaining_version(registry, tmp_path):
+    import shutil
+
+    for name in ('v1', 'v2', 'v3'):
+        write_version(tmp_path, name)
+    registry.refresh()
+    shutil.rmtree(tmp_path / 'v3')
+    registry.refresh()
+    assert registry.default.name == 'v2'
+    # v1 was evicted; it is reconsidered now that the default is gone
+    assert registry.refresh() == ['v1']
+    assert registry.default.name == 'v2'
+
+    shutil.rmtree(tmp_path / 'v1')
+    registry.refresh()
+    assert 'v1' not in registry._evicted
+
+
+def test_candidate_is_kept_and_routed_by_answers(registry, tmp_path):
+    registry.candidate_name = 'v9'
+    registry.candidate_fraction = 0.5
+    for name in ('v1', 'v2', 'v3', 'v9'):
+        write_version(tmp_path, name)
+    registry.refresh()
+    assert registry.default.name == 'v3'
+    assert registry.candidate.name == 'v9'
+
+    profiles = answer_profiles(200)
+    routed = [registry.route(answers).name for answers in profiles]
+    assert set(routed) == {'v3', 'v9'}
+    assert routed == [registry.route(answers).name for answers in profiles]
@@ -0,0 +1,38 @@
+import os
+
+from profiling import RequestProfiler
+
+
+def work():
+    return sum(i * i for i in range(1000))
+
+
+def test_forced_requests_need_the_operator_flag(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+    with profiler.profile(force=True) as summary:
+        work()
+    assert summary is None
+    assert os.listdir(tmp_path) == []
+
+    profiler.allow_force = True
+    with profiler.profile(force=True) as summary:
+        work()
+    assert os.path.exists(summary)
+    assert os.path.exists(summary[:-len('.txt')] + '.prof')
+
+
+def test_captures_are_capped(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), keep=3, allow_force=True)
+    for _ in range(7):
+        with profiler.profile(force=True):
+            work()
+    assert profiler.captured == 7
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.prof')]) == 3
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.txt')]) == 3
+
+
+def test_allow_force_comes_from_the_environment(monkeypatch):
+    monkeypatch.delenv('HEART_PROFILE_ALLOW_FORCE', raising=False)
+    assert not RequestProfiler.from_env().should_profile(force=True)
+    monkeypatch.setenv('HEART_PROFILE_ALLOW_FORCE', '1')
+    assert RequestProfiler.from_env().should_profile(force=True)
@@ -0,0 +1,170 @@
+import pytest
+
+from conftest import answer_profiles
+from recommendations import RULES, build_recommendations, risk_band, risk_summary
+from schema import FEATURES, OPTIONS
+
+
+def baseline_recommendations(risk, answers, importances):
+    """
+    The if-chain heart_app.py ran before the rule table (user-009), with the
+    DataFrame lookups replaced by `importances[feature]`.
+    Returns:
+    tuple: (summary, recommendations sorted by importance, pie {label: value})
+    """
+    if risk > 70:
+        summary = "Your risk of heart disease is very high. Here are some recommendations to reduce your risk:"
+    elif risk > 40:
+        summary = "Your risk of heart disease is high. Here are some recommendations to reduce your risk:"
+    elif risk > 25:
+        summary = "Your risk of heart disease is moderate. Here are some recommendations to reduce your risk:"
+    else:
+        summary = "Your risk of heart disease is low. Keep up the good work and continue to maintain a healthy lifestyle."
+    if risk <= 25:
+        return summary, [], {}
+
+    feature_name_mapping = {
+        'ever_diagnosed_with_heart_attack': 'Heart Attack',
+        'general_health': 'General Health',
+        'ever_diagnosed_with_a_stroke': 'Stroke',
+        'ever_told_you_have_kidney_disease': 'Kidney Disease',
+        'ever_told_you_had_diabetes': 'Diabetes',
+        'physical_health_status': 'Physical Health',
+        'ever_told_you_had_a_depressive_disorder': 'Depression',
+        'sleep_category': 'Sleep',
+        'age_category': 'Age',
+        'length_of_time_since_last_routine_checkup': 'Checkup Time',
+        'BMI': 'BMI',
+        'smoking_status': 'Smoking',
+        'exercise_status_in_past_30_Days': 'Exercise',
+        'binge_drinking_status': 'Binge Drinking',
+        'drinks_category': 'Alcohol',
+        'could_not_afford_to_see_doctor': 'Doctor Access',
+        'health_care_provider': 'Healthcare Provider',
+        'asthma_Status': 'Asthma',
+        'difficulty_walking_or_climbing_stairs': 'Mobility',
+        'mental_health_status': 'Mental Health',
+    }
+    older_ages = ["Age_55_to_59", "Age_60_to_64", "Age_65_to_69", "Age_70_to_74", "Age_75_to_79", "Age_80_or_older"]
+    not_good_days = ["1_to_13_days_not_good", "14_plus_days_not_good"]
+    a = answers
+    messages = {}
+    for feature in FEATURES:
+        importance = importances[feature]
+        if feature == 'ever_diagnosed_with_heart_attack' and a[feature] == "yes":
+            messages[feature] = f"- History of heart attack contributed {importance:.2f}% to your risk. Regularly visit your cardiologist and adhere to prescribed medications. Monitor any new or worsening symptoms and seek immediate medical attention if needed."
+        if feature == 'ever_diagnosed_with_a_stroke' and a[feature] == "yes":
+            messages[feature] = f"- History of stroke contributed {importance:.2f}% to your risk. Follow your neurologist's recommendations and take prescribed medications consistently. Engage in approved physical therapy or exercises to regain strength and mobility."
+        if feature == 'age_category' and a[feature] in older_ages:
+            messages[feature] = f"- Age category contributed {importance:.2f}% to your risk. While you can't change your age, maintaining a healthy lifestyle can mitigate risks associated with aging. Ensure regular check-ups, eat a balanced diet, stay active, and avoid smoking."
+        if feature == 'general_health' and a[feature] in ["fair", "poor"]:
+            messages[feature] = f"- General health contributed {importance:.2f}% to your risk. Focus on improving your overall health through a balanced diet and regular check-ups."
+        if feature == 'ever_told_you_have_kidney_disease' and a[feature] == "yes":
+            messages[feature] = f"- Kidney disease contributed {importance:.2f}% to your risk. Regularly monitor your kidney function and follow your doctor's advice to manage your condition. Stay hydrated and maintain a kidney-friendly diet."
+        if feature == 'ever_told_you_had_diabetes' and a[feature] == "yes":
+            messages[feature] = f"- Diabetes contributed {importance:.2f}% to your risk. Manage your diabetes through diet, exercise, and medication as prescribed by your doctor."
+        if feature == 'smoking_status' and a[feature] != "never_smoked":
+            messages[feature] = f"- Smoking status contributed {importance:.2f}% to your risk. Quit smoking to significantly reduce your risk of heart disease."
+        if feature == 'exercise_status_in_past_30_Days' and a[feature] == "no":
+            messages[feature] = f"- Lack of exercise contributed {importance:.2f}% to your risk. Engage in regular physical activity to improve your heart health."
+        if feature == 'binge_drinking_status' and a[feature] == "yes":
+            messages[feature] = f"- Binge drinking contributed {importance:.2f}% to your risk. Reducing or eliminating alcohol consumption can significantly lower your risk of heart disease. Consider seeking support for alcohol moderation or cessation if needed."
+        if feature == 'drinks_category' and a[feature] in ["high_consumption_10.01_to_20_drinks", "very_high_consumption_more_than_20_drinks"]:
+            messages[feature] = f"- Alcohol consumption contributed {importance:.2f}% to your risk. Limit alcohol consumption to lower your risk."
+        if feature == 'sleep_category' and a[feature] in ["short_sleep_4_to_5_hours", "very_short_sleep_0_to_3_hours"]:
+            messages[feature] = f"- Sleep category contributed {importance:.2f}% to your risk. Consider aiming for 7-9 hours of quality sleep each night. Adequate sleep is crucial for maintaining heart health."
+        if feature == 'physical_health_status' and a[feature] in not_good_days:
+            messages[feature] = f"- Physical health contributed {importance:.2f}% to your risk. Engage in regular physical activity and consult a healthcare provider if you have persistent physical health issues."
+        if feature == 'mental_health_status' and a[feature] in not_good_days:
+            messages[feature] = f"- Mental health contributed {importance:.2f}% to your risk. Consider seeking support from a mental health professional and practice stress-reducing activities."
+        if feature == 'asthma_Status' and a[feature] in ["current_asthma", "former_asthma"]:
+            messages[feature] = f"- Asthma contributed {importance:.2f}% to your risk. Manage your asthma by following your treatment plan, avoiding asthma triggers, and using your medications as prescribed."
+        if feature == 'ever_told_you_had_a_depressive_disorder' and a[feature] == "yes":
+            messages[feature] = f"- Depressive disorder contributed {importance:.2f}% to your risk. Consider seeking support from a mental health professional, practicing stress-reducing activities, and maintaining a healthy lifestyle to manage depressive symptoms."
+        if feature == 'difficulty_walking_or_climbing_stairs' and a[feature] == "yes":
+            messages[feature] = f"- Difficulty walking or climbing stairs contributed {importance:.2f}% to your risk. Consider consulting with a healthcare provider for appropriate interventions and exercises to improve mobility and strength."
+        if feature == 'length_of_time_since_last_routine_checkup' and a[feature] != "past_year":
+            messages[feature] = f"- Time since last routine checkup contributed {importance:.2f}% to your risk. Regular health checkups are important for early detection and management of health conditions. Schedule regular appointments with your healthcare provider to monitor and maintain your heart health."
+        if feature == 'could_not_afford_to_see_doctor' and a[feature] == "yes":
+            messages[feature] = f"- Difficulty affording to see a doctor contributed {importance:.2f}% to your risk. Explore community health services, sliding scale clinics, or health insurance options to ensure you have access to necessary medical care."
+        if feature == 'health_care_provider' and a[feature] == "no":
+            messages[feature] = f"- Not having a primary health care provider contributed {importance:.2f}% to your risk. Establishing a relationship with a primary care provider can help manage and prevent health issues. Consider finding a primary health care provider to ensure regular check-ups and consistent medical advice."
+        if feature == 'BMI' and a[feature] in ["overweight_bmi_25_to_29_9", "obese_bmi_30_or_more"]:
+            messages[feature] = f"- BMI contributed {importance:.2f}% to your risk. Maintaining a healthy weight through a balanced diet and regular exercise can help reduce your risk of heart disease. Consider consulting a healthcare provider for personalized advice."
+
+    ordered = sorted(messages, key=lambda feature: importances[feature], reverse=True)
+    pie = {feature_name_mapping[feature]: importances[feature] for feature in messages}
+    pie['Other Factors'] = 100 - sum(importances[feature] for feature in messages)
+    return summary, [messages[feature] for feature in ordered], pie
+
+
+def spread_importances(seed=0):
+    # Distinct shares summing to 100, so the sort order has no ties:
+    weights = [(i * 7919 + seed * 104729) % 997 + 1 + i / 100 for i in range(len(FEATURES))]
+    return {feature: weight / sum(weights) * 100 for feature, weight in zip(FEATURES, weights)}
+
+
+HEALTHY = {feature: OPTIONS[feature][0] for feature in FEATURES}
+HEALTHY.update({
+    'ever_diagnosed_with_heart_attack': 'no', 'ever_diagnosed_with_a_stroke': 'no',
+    'ever_told_you_had_a_depressive_disorder': 'no', 'ever_told_you_have_kidney_disease': 'no',
+    'ever_told_you_had_diabetes': 'no', 'BMI': 'normal_weight_bmi_18_5_to_24_9',
+    'difficulty_walking_or_climbing_stairs': 'no', 'binge_drinking_status': 'no',
+    'exercise_status_in_past_30_Days': 'yes', 'could_not_afford_to_see_doctor': 'no',
+    'sleep_category': 'normal_sleep_6_to_8_hours',
+})
+SMOKER_SHORT_SLEEP = dict(HEALTHY, smoking_status='current_smoker_every_day', sleep_category='short_sleep_4_to_5_hours')
+OLDER_DIABETIC = dict(HEALTHY, age_category='Age_65_to_69', ever_told_you_had_diabetes='yes', BMI='obese_bmi_30_or_more',
+                      length_of_time_since_last_routine_checkup='past_2_years')
+# Only the non-triggering variant of every conditional answer:
+NEAR_MISSES = dict(HEALTHY, age_category='Age_50_to_54', ever_told_you_had_diabetes='no_prediabetes',
+                   general_health='good', drinks_category='moderate_consumption_5.01_to_10_drinks',
+                   BMI='underweight_bmi_less_than_18_5', asthma_Status='never_asthma',
+                   sleep_category='long_sleep_9_to_10_hours')
+EVERY_RISK_FACTOR = {rule.feature: sorted(rule.categories)[0] if rule.categories is not None
+                     else next(option for option in OPTIONS[rule.feature] if option not in rule.unless)
+                     for rule in RULES}
+EVERY_RISK_FACTOR = dict(HEALTHY, **EVERY_RISK_FACTOR)
+
+
+@pytest.mark.parametrize('risk, answers, features', [
+    (20.0, EVERY_RISK_FACTOR, []),
+    (25.0, SMOKER_SHORT_SLEEP, []),
+    (30.0, HEALTHY, []),
+    (30.0, NEAR_MISSES, []),
+    (25.01, SMOKER_SHORT_SLEEP, ['smoking_status', 'sleep_category']),
+    (55.0, OLDER_DIABETIC, ['age_category', 'ever_told_you_had_diabetes', 'BMI',
+                            'length_of_time_since_last_routine_checkup']),
+    (85.0, EVERY_RISK_FACTOR, [rule.feature for rule in RULES]),
+])
+def test_profiles_match_the_baseline(risk, answers, features):
+    importances = spread_importances()
+    summary, messages, pie = baseline_recommendations(risk, answers, importances)
+    advice = build_recommendations(risk, answers, importances)
+
+    assert sorted(item[0] for item in advice.items) == sorted(features)
+    assert advice.summary == summary
+    assert advice.messages == messages
+    if risk > 25:
+        # The pie chart is only drawn above the recommendation threshold
+        assert dict(zip(advice.pie_labels, advice.pie_values)) == pytest.approx(pie)
+
+
+@pytest.mark.parametrize('risk, band', [
+    (0.0, 'low'), (25.0, 'low'), (25.01, 'moderate'), (40.0, 'moderate'),
+    (40.01, 'high'), (70.0, 'high'), (70.01, 'very high'), (100.0, 'very high'),
+])
+def test_risk_band_boundaries(risk, band):
+    assert risk_band(risk) == band
+    assert risk_summary(risk) == baseline_recommendations(risk, HEALTHY, spread_importances())[0]
+
+
+def test_random_profiles_match_the_baseline():
+    for seed, answers in enumerate(answer_profiles(500, seed=9)):
+        importances = spread_importances(seed)
+        risk = 20.0 + seed % 70
+        summary, messages, pie = baseline_recommendations(risk, answers, importances)
+        advice = build_recommendations(risk, answers, importances)
+        assert (advice.summary, advice.messages) == (summary, messages)
+        if risk > 25:
+            assert dict(zip(advice.pie_labels, advice.pie_values)) == pytest.approx(pie)
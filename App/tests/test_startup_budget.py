@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from conftest import artifact
+from startup import DEFAULT_BUDGET, app_import_statements, parse_importtime, profile_cold_start
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2000 |       5000 | numpy
+import time:       300 |        300 |     numpy.core
+import time:      1000 |    1500000 | streamlit
+"""
+
+
+def test_app_imports_are_read_from_heart_app():
+    statements = app_import_statements()
+    for statement in ('import streamlit as st', 'import metrics', 'from profiling import profiler',
+                      'from pie_chart import pie_charts', 'from assessment_cache import cached_assess',
+                      'from recommendations import build_recommendations'):
+        assert statement in statements
+
+
+def test_parse_importtime_keeps_top_level_imports_slowest_first():
+    assert parse_importtime(IMPORTTIME) == [('streamlit', 1.5), ('numpy', 0.005)]
+
+
+def test_cold_start_within_budget():
+    artifact('best_model.pkl')
+    artifact('cbe_encoder.pkl')
+    for module in ('streamlit', 'PIL', 'numpy', 'lightgbm', 'imblearn', 'category_encoders', 'shap'):
+        pytest.importorskip(module)
+
+    budget = float(os.environ.get('HEART_STARTUP_BUDGET', DEFAULT_BUDGET))
+    report = profile_cold_start()
+    slowest = ', '.join(f'{name} {seconds:.2f}s' for name, seconds in report['imports'][:5])
+    assert report['total_seconds'] <= budget, (
+        f"cold start {report['total_seconds']:.2f}s over budget {budget:.2f}s "
+        f"(steps {report['steps']}, slowest imports: {slowest})"
+    )
+    assert report['import_seconds'] <= report['total_seconds']
@@ -0,0 +1,32 @@
+import os
+from contextlib import nullcontext
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from thread_budget import ThreadBudget  # noqa: E402
+
+
+def test_threads_grow_with_the_batch_up_to_the_cap():
+    budget = ThreadBudget(max_threads=4, rows_per_thread=100)
+    assert [budget.threads_for(n) for n in (1, 99, 100, 250, 10000)] == [1, 1, 1, 2, 4]
+
+
+def test_threadpool_controller_is_built_once():
+    pytest.importorskip('threadpoolctl')
+    budget = ThreadBudget()
+    assert budget.threadpools() is budget.threadpools()
+    with budget.limit(1), budget.limit(10 ** 6):
+        pass
+
+
+def test_limit_is_skipped_at_the_process_cap():
+    pytest.importorskip('threadpoolctl')
+    budget = ThreadBudget(max_threads=os.cpu_count() or 1, rows_per_thread=1)
+    assert not isinstance(budget.limit(10 ** 6), nullcontext)
+    budget.cap_process()
+    try:
+        assert isinstance(budget.limit(10 ** 6), nullcontext)
+    finally:
+        budget._process_limits.restore_original_limits()
@@ -0,0 +1,127 @@
+import os
+import threading
+from contextlib import nullcontext
+
+import numpy as np
+
+
+class ThreadBudget:
+    """
+    Serving-side control of LightGBM, OpenMP and BLAS threads.
+    The model was trained with `LGBMClassifier(n_jobs=-1)`, so out of the box every
+    prediction of every session fans out to one thread per core. With several
+    concurrent sessions that oversubscribes the CPU and inflates tail latency.
+    The budget instead:
+    * overrides `n_jobs` on every ensemble member when the model is loaded,
+    * caps the process-wide OpenMP/BLAS thread pools at `max_threads`,
+    * predicts small batches on a single thread and only uses several threads
+      (at most `max_threads`) for batches of `rows_per_thread` rows or more.
+    Parameters:
+    max_threads (int): Threads one prediction may use (default: all cores).
+    rows_per_thread (int): Batch rows that justify one extra thread.
+    """
+
+    def __init__(self, max_threads=None, rows_per_thread=2000):
+        self.max_threads = max_threads or os.cpu_count() or 1
+        self.rows_per_thread = rows_per_thread
+        self._process_limits = None
+        self._threadpools = None
+        self._threadpools_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build the budget from HEART_MAX_THREADS and HEART_ROWS_PER_THREAD.
+        """
+        return cls(
+            max_threads=int(os.environ.get('HEART_MAX_THREADS', 0)) or None,
+            rows_per_thread=int(os.environ.get('HEART_ROWS_PER_THREAD', 2000)),
+        )
+
+    def threads_for(self, n_rows):
+        """
+        Threads to use for a batch of `n_rows` rows: 1 for interactive requests,
+        growing with the batch size up to `max_threads`.
+        """
+        return int(max(1, min(self.max_threads, n_rows // self.rows_per_thread)))
+
+    def configure_model(self, model):
+        """
+        Override `n_jobs` on every member of a freshly loaded ensemble, so nothing
+        falls back to the training-time `n_jobs=-1`. Boosters-only members
+        (compaction.py) have no `n_jobs`; `predict_proba` below sets threads per call.
+        """
+        from explainers import ensemble_members
+
+        for member in ensemble_members(model):
+            if hasattr(member, 'set_params'):
+                member.set_params(n_jobs=1)
+        return model
+
+    def threadpools(self):
+        """
+        The threadpoolctl controller of this process, built once: building one
+        scans every loaded library (about 10 ms with LightGBM loaded), which
+        would cost more than a cached single-row explanation on every request.
+        It only sees the libraries loaded when it is built, so the first call
+        must come after the model was loaded. None without threadpoolctl.
+        """
+        if self._threadpools is None:
+            with self._threadpools_lock:
+                if self._threadpools is None:
+                    try:
+                        from threadpoolctl import ThreadpoolController
+                    except ImportError:
+                        return None
+                    self._threadpools = ThreadpoolController()
+        return self._threadpools
+
+    def cap_process(self):
+        """
+        Cap the OpenMP and BLAS thread pools of this process at `max_threads`.
+        threadpoolctl comes with scikit-learn; NumPy-only processes (flat backend)
+        may not have it, and then keep their default thread pools.
+        """
+        threadpools = self.threadpools()
+        if threadpools is not None:
+            self._process_limits = threadpools.limit(limits=self.max_threads)
+        return self
+
+    def limit(self, n_rows):
+        """
+        Limit the OpenMP threads started from the calling thread while explaining
+        a batch of `n_rows` rows (SHAP runs LightGBM's pred_contrib under the hood).
+        Nothing is changed when the process is already capped at that many threads.
+        """
+        threads = self.threads_for(n_rows)
+        threadpools = self.threadpools()
+        if threadpools is None or (self._process_limits is not None and threads == self.max_threads):
+            return nullcontext()
+        return threadpools.limit(limits=threads, user_api='openmp')
+
+    def predict_proba(self, model, X):
+        """
+        Ensemble `predict_proba` with an explicit per-call thread count.
+        Mirrors what EasyEnsembleClassifier.predict_proba computes (the mean of the
+        member probabilities, each member on its own columns), but calls every
+        member's booster with `num_threads`, which is honored per call. A shared
+        `n_jobs` attribute would race between concurrent sessions.
+        Models without LightGBM members are called as they are.
+        """
+        members = getattr(model, 'estimators_', None)
+        if members is None:
+            return model.predict_proba(X)
+
+        from explainers import ensemble_feature_indices, ensemble_members
+
+        X = np.asarray(X)
+        num_threads = self.threads_for(X.shape[0])
+        positive = np.zeros(X.shape[0])
+        for member, features in zip(ensemble_members(model), ensemble_feature_indices(model)):
+            positive += member.booster_.predict(X[:, features], num_threads=num_threads)
+        positive /= len(members)
+        return np.column_stack([1 - positive, positive])
+
+
+# The budget shared by the app, the scoring API and the batch jobs of this process:
+budget = ThreadBudget.from_env()
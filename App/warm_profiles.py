@@ -0,0 +1,143 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from resources import artifact_path
+from schema import FEATURES
+
+WARM_TABLE = 'warm_profiles.feather'
+
+
+def top_profiles(df, n_profiles):
+    """
+    Find the most frequent combinations of the 22 answers.
+    Parameters:
+    df (pd.DataFrame): Reference dataset with (at least) the FEATURES columns.
+    n_profiles (int): Number of profiles to keep.
+    Returns:
+    pd.DataFrame: FEATURES columns plus `count`, most frequent first.
+    """
+    counts = df.groupby(FEATURES, observed=True, sort=False).size()
+    top = counts.nlargest(n_profiles)
+    profiles = top.index.to_frame(index=False).astype(str)
+    profiles['count'] = top.to_numpy()
+    return profiles
+
+
+def score_profiles(profiles, model, encoder, explainer_pool, batch_size=1000):
+    """
+    Score and explain the profiles in batches with the served model.
+    Returns:
+    pd.DataFrame: `profiles` plus `risk` and one `contrib__<feature>` column per feature.
+    """
+    from assessment import assess_batch
+
+    answers = profiles[FEATURES].to_dict('records')
+    risks = np.empty(len(answers))
+    contributions = np.empty((len(answers), len(FEATURES)), dtype=np.float32)
+    for start in range(0, len(answers), batch_size):
+        results = assess_batch(answers[start:start + batch_size], model, encoder, explainer_pool)
+        for i, result in enumerate(results, start=start):
+            risks[i] = result.risk
+            contributions[i] = result.contributions
+
+    table = profiles.copy()
+    table['risk'] = risks
+    for j, feature in enumerate(FEATURES):
+        table[f'contrib__{feature}'] = contributions[:, j]
+    return table
+
+
+def write_table(table, path, model_version):
+    """
+    Write the precomputed table as Feather, tagged with the model version it was built with.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+    arrow_table = arrow_table.replace_schema_metadata({'model_version': model_version})
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    feather.write_feather(arrow_table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_payloads(path, model_version, encoder):
+    """
+    Read a precomputed table back as PredictionResult payloads.
+    Parameters:
+    path (str): Table written by `write_table`.
+    model_version (str): Version currently served; a table built by another model is ignored.
+    encoder (FrozenEncoder): Used to rebuild the encoded rows (a table lookup, no model work).
+    Returns:
+    list: Payloads for AssessmentCache.seed, or [] when the table is missing or stale.
+    """
+    if not os.path.exists(path):
+        return []
+    import pyarrow.feather as feather
+
+    arrow_table = feather.read_table(path, memory_map=True)
+    metadata = arrow_table.schema.metadata or {}
+    if metadata.get(b'model_version', b'').decode() != model_version:
+        return []
+
+    table = arrow_table.to_pandas()
+    answers = table[FEATURES].astype(str).to_dict('records')
+    encoded = encoder.encode_columns({feature: table[feature].to_numpy(dtype=str) for feature in FEATURES})
+    contributions = table[[f'contrib__{feature}' for feature in FEATURES]].to_numpy(dtype=float)
+    shares = np.abs(contributions)
+    totals = shares.sum(axis=1, keepdims=True)
+    totals[totals == 0] = 1.0
+    shares = shares / totals * 100
+    risks = table['risk'].to_numpy(dtype=float)
+
+    return [
+        {
+            'answers': answers[i],
+            'encoded': encoded[i].tolist(),
+            'risk': float(risks[i]),
+            'contributions': contributions[i].tolist(),
+            'importances': dict(zip(FEATURES, shares[i].tolist())),
+        }
+        for i in range(len(answers))
+    ]
+
+
+def ensure_warm(cache, model_version, encoder, path=None):
+    """
+    Seed the cache's warm tier from the precomputed table once per model version.
+    """
+    if cache.warm_version == model_version:
+        return cache
+    payloads = read_payloads(path or artifact_path(WARM_TABLE), model_version, encoder)
+    cache.seed(model_version, payloads)
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute assessments of the most frequent BRFSS answer profiles.')
+    parser.add_argument('--top', type=int, default=5000, help='Number of profiles to precompute.')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Profiles scored per model call.')
+    parser.add_argument('--output', default=artifact_path(WARM_TABLE), help='Destination Feather file.')
+    args = parser.parse_args()
+
+    from backends import backend_version, get_backend
+    from explainers import get_explainer_pool
+    from fast_encoder import get_frozen_encoder
+    from reference_data import read_columns
+
+    # Risks come from the HEART_BACKEND backend and the table is tagged with its
+    # version, so the app only seeds it when serving that same backend:
+    start = time.perf_counter()
+    profiles = top_profiles(read_columns(FEATURES), args.top)
+    coverage = profiles['count'].sum()
+    table = score_profiles(profiles, get_backend(), get_frozen_encoder(), get_explainer_pool(), args.batch_size)
+    write_table(table, args.output, backend_version())
+    print(f'Wrote {len(table)} profiles covering {coverage} respondents to {args.output} '
+          f'in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+import gc
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from assessment import PredictionResult, assess_batch
+from backends import predict_positive
+from thread_budget import budget
+
+# Read-only serving state. It is filled in the parent before the workers are
+# forked, so every worker sees the same model pages (copy-on-write) instead of
+# unpickling its own copy.
+_shared = {}
+
+
+def _init_worker(threads_per_worker):
+    # Cap the OpenMP/BLAS threads of this worker, so N workers use about N x
+    # threads_per_worker cores instead of N x all cores (the OpenMP runtime was
+    # loaded before the fork, so this goes through threadpoolctl, not the env):
+    budget.max_threads = threads_per_worker
+    budget.cap_process()
+    _shared['explainer_pool'].warm()
+
+
+def _score_job(answers_list):
+    encoded = _shared['encoder'].encode_records(answers_list)
+    return (predict_positive(_shared['model'], encoded, answers_list) * 100).tolist()
+
+
+def _assess_job(answers_list):
+    results = assess_batch(answers_list, _shared['model'], _shared['encoder'], _shared['explainer_pool'])
+    return [result.to_dict() for result in results]
+
+
+class InferencePool:
+    """
+    Process pool for CPU-heavy scoring and explanation work.
+    The model, frozen encoder and (unwarmed) explainer pool are loaded in this
+    process, then `gc.freeze()` moves them out of the garbage collector's reach
+    (so workers don't dirty the shared pages by touching them) and the workers
+    are forked all at once. Sessions submit jobs and get Futures back, so the
+    Streamlit script thread only waits instead of contending for the GIL.
+    Create the pool before anything in this process runs a LightGBM prediction:
+    OpenMP thread pools do not survive a fork. That holds for the pool's whole
+    life, since `multiprocessing.Pool` forks a replacement whenever a worker
+    dies: while the pool is enabled this process never scores or explains
+    itself (see startup.py).
+    `model_version` is the version the workers were forked with; they keep that
+    model, so `get_inference_pool` replaces the pool when the served model changes.
+    Parameters:
+    workers (int): Worker processes (default: cores // threads_per_worker).
+    threads_per_worker (int): OpenMP/BLAS/LightGBM threads allowed per worker.
+    """
+
+    def __init__(self, workers=None, threads_per_worker=1):
+        from explainers import get_explainer_pool
+        from backends import backend_version, get_backend, get_backend_encoder
+
+        self.threads_per_worker = threads_per_worker
+        self.workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+        _shared['model'] = get_backend()
+        _shared['encoder'] = get_backend_encoder()
+        _shared['explainer_pool'] = get_explainer_pool(warm=False)
+        self.model_version = backend_version()
+
+        gc.collect()
+        gc.freeze()
+        context = multiprocessing.get_context('fork')
+        # multiprocessing.Pool forks every worker right away (ProcessPoolExecutor
+        # would fork lazily, possibly after this process started OpenMP threads):
+        self._pool = context.Pool(self.workers, initializer=_init_worker, initargs=(threads_per_worker,))
+
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_in_flight = 0
+        self._busy_seconds = 0.0
+
+    def _submit(self, job, answers_list):
+        future = Future()
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+            self.max_in_flight = max(self.max_in_flight, self.submitted - self.completed - self.failed)
+
+        def done(value):
+            with self._lock:
+                self.completed += 1
+                self._busy_seconds += time.perf_counter() - submitted_at
+            future.set_result(value)
+
+        def failed(error):
+            with self._lock:
+                self.failed += 1
+            future.set_exception(error)
+
+        self._pool.apply_async(job, (answers_list,), callback=done, error_callback=failed)
+        return future
+
+    def submit_score(self, answers_list):
+        """
+        Score a batch of answer dicts in a worker.
+        Returns:
+        Future: Resolves to the risks in percent, in input order.
+        """
+        return self._submit(_score_job, answers_list)
+
+    def submit_assess(self, answers_list):
+        """
+        Score and explain a batch of answer dicts in a worker.
+        Returns:
+        Future: Resolves to PredictionResult.to_dict() payloads, in input order.
+        """
+        return self._submit(_assess_job, answers_list)
+
+    def assess(self, answers_list, timeout=None):
+        """
+        Blocking helper: assess in a worker and rebuild the PredictionResults.
+        """
+        payloads = self.submit_assess(answers_list).result(timeout)
+        return [PredictionResult.from_dict(payload, source='worker') for payload in payloads]
+
+    def worker_pids(self):
+        """
+        Process ids of the live workers (multiprocessing.Pool keeps them in `_pool`).
+        """
+        return [process.pid for process in self._pool._pool]
+
+    def stats(self):
+        """
+        Return queue-depth metrics: jobs in flight, jobs waiting for a free
+        worker, and the mean submit-to-result time.
+        """
+        with self._lock:
+            in_flight = self.submitted - self.completed - self.failed
+            return {
+                'workers': self.workers,
+                'threads_per_worker': self.threads_per_worker,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'in_flight': in_flight,
+                'queue_depth': max(0, in_flight - self.workers),
+                'max_in_flight': self.max_in_flight,
+                'mean_job_ms': round(self._busy_seconds / self.completed * 1000, 3) if self.completed else None,
+            }
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+
+_inference_pool = None
+_inference_pool_lock = threading.Lock()
+
+
+def get_inference_pool():
+    """
+    Return the process-wide inference pool, or None when it is disabled.
+    It is enabled by setting HEART_INFERENCE_WORKERS (0 = one per core); the
+    per-worker thread cap comes from HEART_WORKER_THREADS (default 1).
+    When the served model was reloaded since the workers were forked, a new pool
+    is forked with it and the old one is closed once its jobs are done.
+    """
+    global _inference_pool
+    if 'HEART_INFERENCE_WORKERS' not in os.environ:
+        return None
+    from backends import backend_version
+
+    version = backend_version()
+    pool = _inference_pool
+    if pool is None or pool.model_version != version:
+        with _inference_pool_lock:
+            stale = _inference_pool
+            if stale is None or stale.model_version != version:
+                _inference_pool = InferencePool(
+                    workers=int(os.environ['HEART_INFERENCE_WORKERS']) or None,
+                    threads_per_worker=int(os.environ.get('HEART_WORKER_THREADS', 1)),
+                )
+                if stale is not None:
+                    threading.Thread(target=stale.close, name='inference-pool-close', daemon=True).start()
+            pool = _inference_pool
+    return pool
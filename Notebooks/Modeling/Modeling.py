@@ -743,6 +743,27 @@ pickle.dump(cbe_encoder, pickle_out)
 pickle_out.close()
 
 
+# In[26]:
+
+
+# Saving the training data hash and test metrics next to the pickles. Copy the three
+# files into App/ and run `python model_bundle.py` there to build the versioned model
+# bundle the app loads without unpickling (see App/model_bundle.py); its manifest
+# records this metadata.
+import hashlib
+import json
+
+training_data_sha256 = hashlib.sha256()
+with open('brfss2022_data_wrangling_output.csv', 'rb') as f:
+    for chunk in iter(lambda: f.read(1 << 20), b''):
+        training_data_sha256.update(chunk)
+
+with open('model_metadata.json', 'w') as f:
+    json.dump({'training_data_sha256': training_data_sha256.hexdigest(),
+               'metrics': {'accuracy': float(accuracy), 'precision': float(precision[1]), 'recall': float(recall[1]),
+                           'f1': float(f1[1]), 'roc_auc': float(roc_auc)}}, f, indent=2)
+
+
 #33333333333333333333333333333
 
 from sklearn.linear_model import LogisticRegression